@@ -8,17 +8,145 @@ Author: SM2 Research Team
 License: MIT
 """
 
+import functools
 import hashlib
 import secrets
 import struct
 import time
 from typing import Tuple, Optional, List, Dict, Any
 import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
 
 # Import basic SM2 implementation
-from .sm2_basic import SM2, Point, CurveParams
+from .sm2_basic import SM2Basic, SM2Point as Point
+
+@dataclass(frozen=True)
+class CurveParams:
+    """SM2 curve domain parameters"""
+    p: int
+    a: int
+    b: int
+    n: int
+    gx: int
+    gy: int
+
+class SM2(SM2Basic):
+    """SM2Basic with its domain parameters grouped as ``curve``"""
+    
+    def __init__(self):
+        super().__init__()
+        self.curve = CurveParams(p=self.p, a=self.a, b=self.b, n=self.n,
+                                 gx=self.Gx, gy=self.Gy)
+
+@functools.lru_cache(maxsize=1)
+def _default_sm2() -> SM2:
+    """Shared SM2 instance used by all utility classes"""
+    return SM2()
+
+def _message_digest(message: bytes) -> bytes:
+    """SHA-256 digest of a chained message (not cached: messages may be arbitrarily large)"""
+    return hashlib.sha256(message).digest()
+
+def _load_sm3():
+    """Pick the fastest available SM3 implementation"""
+    try:
+        # OpenSSL ships SM3 since 1.1.1; copying a prototype skips the name lookup
+        new_sm3 = hashlib.new('sm3').copy
+    except ValueError:
+        new_sm3 = None
+    
+    if new_sm3 is not None:
+        def sm3_digest(message: bytes) -> bytes:
+            h = new_sm3()
+            h.update(message)
+            return h.digest()
+        return sm3_digest
+    
+    try:
+        from gmssl import sm3
+    except ImportError:
+        # No SM3 available, fall back to SHA-256 as before
+        return lambda message: hashlib.sha256(message).digest()
+    return lambda message: bytes.fromhex(sm3.sm3_hash(list(message)))
+
+_sm3_digest = _load_sm3()
+
+def _derive_fernet_key(password: str, salt: bytes) -> bytes:
+    """Derive a Fernet key with PBKDF2-HMAC-SHA256 (100000 iterations)
+
+    Produces the same key as cryptography's PBKDF2HMAC with these parameters,
+    so exports encrypted before the switch keep their key; _decrypt_key_data
+    also unwraps their older base64-wrapped token format.
+    """
+    import base64
+    # A 32-byte key is a single PBKDF2 block, computed entirely inside OpenSSL
+    derived = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, 100000, dklen=32)
+    return base64.urlsafe_b64encode(derived)
+
+_PEM_LINE = re.compile('.{1,64}')
+
+def _wrap_pem_body(encoded: str) -> str:
+    """Break base64 text into 64-character PEM lines in a single regex pass"""
+    return "\n".join(_PEM_LINE.findall(encoded))
+
+def _bytes_to_int(data: bytes) -> int:
+    """Convert bytes to integer"""
+    return int.from_bytes(data, 'big')
+
+def _int_to_bytes(value: int, length: int = 32) -> bytes:
+    """Convert integer to bytes with specified length"""
+    return value.to_bytes(length, 'big')
+
+def _point_to_bytes(point: Point, compressed: bool = False) -> bytes:
+    """Convert point to byte representation"""
+    if compressed:
+        return (b'\x03' if point.y & 1 else b'\x02') + point.x.to_bytes(32, 'big')
+    return b'\x04' + point.x.to_bytes(32, 'big') + point.y.to_bytes(32, 'big')
+
+def _bytes_to_point(data: bytes, curve: Optional[CurveParams] = None) -> Point:
+    """Convert byte representation to point"""
+    if len(data) == 33:  # Compressed
+        prefix = data[0]
+        if prefix not in (0x02, 0x03):
+            raise ValueError("Invalid compressed point prefix")
+        if curve is None:
+            curve = _default_sm2().curve
+        p = curve.p
+        x = int.from_bytes(data[1:33], 'big')
+        alpha = (x * x * x + curve.a * x + curve.b) % p
+        # SM2's p is 3 mod 4, so the square root is a single exponentiation
+        beta = pow(alpha, (p + 1) // 4, p)
+        if beta * beta % p != alpha:
+            raise ValueError("Point is not on the curve")
+        y = beta if (beta & 1) == (prefix & 1) else p - beta
+        return Point(x, y)
+    elif len(data) == 65:  # Uncompressed
+        if data[0] != 0x04:
+            raise ValueError("Invalid uncompressed point prefix")
+        return Point(int.from_bytes(data[1:33], 'big'), int.from_bytes(data[33:65], 'big'))
+    else:
+        raise ValueError("Invalid point data length")
+
+# Batches smaller than this are verified serially to avoid process start-up cost
+PARALLEL_VERIFY_THRESHOLD = 32
+
+# Per-process verifier used by _verify_one in worker processes
+_worker_verifier: Optional['SM2SignatureVerifier'] = None
+
+def _verify_one(message: bytes, r: int, s: int, pub_x: int, pub_y: int,
+                user_id: bytes) -> bool:
+    """Verify a single batch entry inside a worker process"""
+    global _worker_verifier
+    if _worker_verifier is None:
+        _worker_verifier = SM2SignatureVerifier()
+    return _worker_verifier._verify_entry(message, r, s, pub_x, pub_y, user_id)
+
+# Validation results keyed by (p, a, b, n, gx, gy)
+_validated_curves: Dict[Tuple[int, ...], bool] = {}
 
 class KeyFormat(Enum):
     """Supported key formats"""
@@ -46,18 +174,18 @@ class SM2KeyPair:
     def to_dict(self) -> Dict[str, Any]:
         """Convert key pair to dictionary"""
         return {
-            'private_key': hex(self.private_key),
+            'private_key': f"0x{self.private_key:x}",
             'public_key': {
-                'x': hex(self.public_key.x),
-                'y': hex(self.public_key.y)
+                'x': f"0x{self.public_key.x:x}",
+                'y': f"0x{self.public_key.y:x}"
             },
             'curve_params': {
-                'p': hex(self.curve_params.p),
-                'a': hex(self.curve_params.a),
-                'b': hex(self.curve_params.b),
-                'n': hex(self.curve_params.n),
-                'gx': hex(self.curve_params.gx),
-                'gy': hex(self.curve_params.gy)
+                'p': f"0x{self.curve_params.p:x}",
+                'a': f"0x{self.curve_params.a:x}",
+                'b': f"0x{self.curve_params.b:x}",
+                'n': f"0x{self.curve_params.n:x}",
+                'gx': f"0x{self.curve_params.gx:x}",
+                'gy': f"0x{self.curve_params.gy:x}"
             },
             'created_at': self.created_at,
             'key_id': self.key_id
@@ -90,11 +218,16 @@ class SM2KeyManager:
     """SM2 Key management utilities"""
     
     def __init__(self):
-        self.sm2 = SM2()
+        self.sm2 = _default_sm2()
     
     def generate_keypair(self, key_id: Optional[str] = None) -> SM2KeyPair:
         """Generate a new SM2 key pair"""
-        private_key = secrets.randbelow(self.sm2.curve.n - 1) + 1
+        n = self.sm2.curve.n
+        # Rejection-sample d in [1, n-1] from 256-bit draws
+        while True:
+            private_key = int.from_bytes(secrets.token_bytes(32), 'big')
+            if 1 <= private_key < n:
+                break
         public_key = self.sm2.point_multiply(private_key, self.sm2.G)
         
         return SM2KeyPair(
@@ -113,7 +246,7 @@ class SM2KeyManager:
                           password: Optional[str] = None) -> str:
         """Export private key in specified format"""
         if format == KeyFormat.HEX:
-            return f"{keypair.private_key:064x}"
+            return keypair.private_key.to_bytes(32, 'big').hex()
         elif format == KeyFormat.JSON:
             data = keypair.to_dict()
             if password:
@@ -127,7 +260,7 @@ class SM2KeyManager:
     def export_public_key(self, keypair: SM2KeyPair, format: KeyFormat) -> str:
         """Export public key in specified format"""
         if format == KeyFormat.HEX:
-            return f"04{keypair.public_key.x:064x}{keypair.public_key.y:064x}"
+            return _point_to_bytes(keypair.public_key).hex()
         elif format == KeyFormat.JSON:
             return json.dumps({
                 'public_key': {
@@ -174,45 +307,32 @@ class SM2KeyManager:
         # In production, use proper key derivation and encryption
         import base64
         from cryptography.fernet import Fernet
-        from cryptography.hazmat.primitives import hashes
-        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
         
         salt = secrets.token_bytes(16)
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
-        f = Fernet(key)
+        f = Fernet(_derive_fernet_key(password, salt))
         
         encrypted_data = f.encrypt(json.dumps(data).encode())
         
         return {
             'encrypted': True,
             'salt': base64.b64encode(salt).decode(),
-            'data': base64.b64encode(encrypted_data).decode()
+            # Fernet tokens are already URL-safe base64 ASCII
+            'data': encrypted_data.decode('ascii')
         }
     
     def _decrypt_key_data(self, data: Dict[str, Any], password: str) -> Dict[str, Any]:
         """Decrypt key data with password"""
         import base64
         from cryptography.fernet import Fernet
-        from cryptography.hazmat.primitives import hashes
-        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
         
         salt = base64.b64decode(data['salt'])
-        encrypted_data = base64.b64decode(data['data'])
+        encrypted_data = data['data'].encode('ascii')
+        # Older exports wrapped the Fernet token in an extra base64 layer;
+        # a bare token always starts with the version byte 0x80 ("gAAAAA")
+        if not encrypted_data.startswith(b'gAAAAA'):
+            encrypted_data = base64.b64decode(encrypted_data)
         
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
-        f = Fernet(key)
+        f = Fernet(_derive_fernet_key(password, salt))
         
         decrypted_data = f.decrypt(encrypted_data)
         return json.loads(decrypted_data.decode())
@@ -224,16 +344,14 @@ class SM2KeyManager:
         footer = "-----END SM2 PRIVATE KEY-----"
         
         import base64
-        key_data = f"{keypair.private_key:064x}"
+        key_data = keypair.private_key.to_bytes(32, 'big')
         if password:
             # In practice, use proper PKCS#8 encryption
-            key_data = f"ENCRYPTED:{key_data}"
+            key_data = b"ENCRYPTED:" + key_data
         
-        encoded = base64.b64encode(key_data.encode()).decode()
-        # Break into 64-character lines
-        lines = [encoded[i:i+64] for i in range(0, len(encoded), 64)]
+        encoded = base64.b64encode(key_data).decode()
         
-        return f"{header}\n" + "\n".join(lines) + f"\n{footer}"
+        return f"{header}\n{_wrap_pem_body(encoded)}\n{footer}"
     
     def _public_key_to_pem(self, keypair: SM2KeyPair) -> str:
         """Convert public key to PEM format"""
@@ -241,17 +359,17 @@ class SM2KeyManager:
         footer = "-----END SM2 PUBLIC KEY-----"
         
         import base64
-        key_data = f"04{keypair.public_key.x:064x}{keypair.public_key.y:064x}"
-        encoded = base64.b64encode(key_data.encode()).decode()
-        lines = [encoded[i:i+64] for i in range(0, len(encoded), 64)]
+        key_data = (b'\x04' + keypair.public_key.x.to_bytes(32, 'big')
+                    + keypair.public_key.y.to_bytes(32, 'big'))
+        encoded = base64.b64encode(key_data).decode()
         
-        return f"{header}\n" + "\n".join(lines) + f"\n{footer}"
+        return f"{header}\n{_wrap_pem_body(encoded)}\n{footer}"
 
 class SM2SignatureVerifier:
     """Advanced SM2 signature verification utilities"""
     
     def __init__(self):
-        self.sm2 = SM2()
+        self.sm2 = _default_sm2()
     
     def verify_signature(self, message: bytes, signature: Tuple[int, int], 
                         public_key: Point, user_id: bytes = b"1234567812345678") -> bool:
@@ -262,37 +380,157 @@ class SM2SignatureVerifier:
             print(f"Signature verification error: {e}")
             return False
     
+    def _verify_fast(self, message: bytes, signature: Tuple[int, int],
+                     public_key: Point, user_id: bytes = b"1234567812345678") -> bool:
+        """Verify without error reporting; callers handle exceptions themselves"""
+        return self.sm2.verify(message, signature, public_key, user_id)
+    
+    def _verify_entry(self, message: bytes, r: int, s: int, pub_x: int, pub_y: int,
+                      user_id: bytes) -> bool:
+        """Verify one entry of a batch, treating malformed entries as invalid"""
+        try:
+            return self._verify_fast(message, (r, s), Point(pub_x, pub_y), user_id)
+        except Exception:
+            return False
+    
     def batch_verify_signatures(self, signatures_data: List[Dict[str, Any]]) -> List[bool]:
         """Batch verification of multiple signatures"""
+        count = len(signatures_data)
+        messages = [b""] * count
+        r_arr = [0] * count
+        s_arr = [0] * count
+        pub_x = [0] * count
+        pub_y = [0] * count
+        user_ids = [b"1234567812345678"] * count
+        
+        for i, data in enumerate(signatures_data):
+            try:
+                message = data['message']
+                r, s = data['signature']
+                public_key = data['public_key']
+                x, y = public_key.x, public_key.y
+            except Exception:
+                # Leave r = s = 0, which never verifies
+                continue
+            messages[i] = message
+            r_arr[i] = r
+            s_arr[i] = s
+            pub_x[i] = x
+            pub_y[i] = y
+            user_ids[i] = data.get('user_id', b"1234567812345678")
+        
+        return self.batch_verify_signatures_soa(messages, r_arr, s_arr, pub_x, pub_y, user_ids)
+    
+    def batch_verify_signatures_soa(self, messages: List[bytes], r_arr: List[int],
+                                    s_arr: List[int], pub_x: List[int], pub_y: List[int],
+                                    user_ids: Optional[List[bytes]] = None) -> List[bool]:
+        """Batch verification over column-wise (structure-of-arrays) input"""
+        count = len(messages)
+        if user_ids is None:
+            user_ids = [b"1234567812345678"] * count
+        
+        # One byte per result instead of a growing list of boxed bools
+        results = bytearray(count)
+        
+        if count < PARALLEL_VERIFY_THRESHOLD:
+            verify_entry = self._verify_entry
+            for i in range(count):
+                results[i] = 1 if verify_entry(messages[i], r_arr[i], s_arr[i],
+                                               pub_x[i], pub_y[i], user_ids[i]) else 0
+        else:
+            # Verifications are independent and CPU-bound; shard them across processes
+            workers = os.cpu_count() or 1
+            chunksize = max(1, count // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for i, result in enumerate(executor.map(_verify_one, messages, r_arr, s_arr,
+                                                        pub_x, pub_y, user_ids,
+                                                        chunksize=chunksize)):
+                    results[i] = 1 if result else 0
+        
+        return [bool(b) for b in results]
+
+    def _shamir_multiply(self, k1: int, k2: int, P1: Point, P2: Point,
+                         P12: Point) -> Optional[Point]:
+        """Compute k1*P1 + k2*P2 with one shared doubling chain (Shamir's trick)"""
+        point_add = self.sm2.point_add
+        point_double = self.sm2.point_double
+        table = (None, P1, P2, P12)
+
+        result = None
+        for i in range(max(k1.bit_length(), k2.bit_length()) - 1, -1, -1):
+            if result is not None:
+                result = point_double(result)
+            idx = ((k1 >> i) & 1) | (((k2 >> i) & 1) << 1)
+            if idx:
+                result = table[idx] if result is None else point_add(result, table[idx])
+        return result
+
+    def batch_verify_signatures_fast(self, signatures_data: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Batch verification using multi-scalar multiplication
+
+        Each s*G + t*P is evaluated with a single interleaved doubling chain,
+        and the G + P table entry is shared by all signatures under the same
+        public key. Only x(R) mod n is recoverable from an SM2 signature, so
+        signatures are not folded into one random linear combination.
+        """
+        n = self.sm2.curve.n
+        G = self.sm2.G
+        sum_tables = {}
         results = []
+
         for data in signatures_data:
             try:
-                result = self.verify_signature(
-                    data['message'],
-                    data['signature'],
-                    data['public_key'],
-                    data.get('user_id', b"1234567812345678")
-                )
-                results.append(result)
+                r, s = data['signature']
+                public_key = data['public_key']
+                if not (1 <= r <= n - 1 and 1 <= s <= n - 1):
+                    results.append(False)
+                    continue
+                t = (r + s) % n
+                if t == 0:
+                    results.append(False)
+                    continue
+
+                # e = H(ZA || M), derived exactly as in SM2Basic.sign/verify
+                user_id = data.get('user_id', b"1234567812345678")
+                za = self.sm2._get_user_id_hash(user_id)
+                e = int.from_bytes(self.sm2._sm3_hash(za + data['message']), byteorder='big')
+
+                key = (public_key.x, public_key.y)
+                GP = sum_tables.get(key)
+                if GP is None:
+                    GP = sum_tables[key] = self.sm2.point_add(G, public_key)
+
+                point = self._shamir_multiply(s, t, G, public_key, GP)
+                if point is None or getattr(point, 'infinity', False):
+                    results.append(False)
+                    continue
+                results.append((e + point.x) % n == r)
             except Exception:
                 results.append(False)
         return results
-    
+
     def verify_signature_chain(self, signature_chain: List[Dict[str, Any]]) -> bool:
         """Verify a chain of linked signatures"""
+        verify = self._verify_fast
         for i, sig_data in enumerate(signature_chain):
-            if not self.verify_signature(
-                sig_data['message'],
-                sig_data['signature'],
-                sig_data['public_key'],
-                sig_data.get('user_id', b"1234567812345678")
-            ):
+            message = sig_data['message']
+            signature = sig_data['signature']
+            public_key = sig_data['public_key']
+            user_id = sig_data.get('user_id', b"1234567812345678")
+            try:
+                if not verify(message, signature, public_key, user_id):
+                    return False
+            except Exception:
                 return False
             
             # Verify chain linking if specified
             if i > 0 and 'previous_hash' in sig_data:
-                prev_hash = hashlib.sha256(signature_chain[i-1]['message']).hexdigest()
-                if sig_data['previous_hash'] != prev_hash:
+                try:
+                    expected = bytes.fromhex(sig_data['previous_hash'])
+                except ValueError:
+                    return False
+                if _message_digest(signature_chain[i-1]['message']) != expected:
                     return False
         
         return True
@@ -301,18 +539,19 @@ class SM2Benchmarker:
     """Performance benchmarking utilities"""
     
     def __init__(self):
-        self.sm2 = SM2()
+        self.sm2 = _default_sm2()
         self.key_manager = SM2KeyManager()
     
     def benchmark_key_generation(self, num_keys: int = 1000) -> Dict[str, float]:
         """Benchmark key generation performance"""
-        start_time = time.time()
+        generate_keypair = self.key_manager.generate_keypair
+        
+        t0 = time.perf_counter_ns()
         
         for _ in range(num_keys):
-            self.key_manager.generate_keypair()
+            generate_keypair()
         
-        end_time = time.time()
-        total_time = end_time - start_time
+        total_time = (time.perf_counter_ns() - t0) / 1e9
         
         return {
             'total_time': total_time,
@@ -324,14 +563,43 @@ class SM2Benchmarker:
         """Benchmark signing performance"""
         keypair = self.key_manager.generate_keypair()
         message = secrets.token_bytes(message_size)
+        sign = self.sm2.sign
+        private_key = keypair.private_key
         
-        start_time = time.time()
+        t0 = time.perf_counter_ns()
         
         for _ in range(num_signatures):
-            self.sm2.sign(message, keypair.private_key)
+            sign(message, private_key)
+        
+        total_time = (time.perf_counter_ns() - t0) / 1e9
+        
+        return {
+            'total_time': total_time,
+            'signatures_per_second': num_signatures / total_time,
+            'time_per_signature': total_time / num_signatures,
+            'message_size': message_size
+        }
+    
+    def benchmark_signing_varied(self, message_size: int = 1024, num_signatures: int = 1000) -> Dict[str, float]:
+        """Benchmark signing over distinct messages, including per-message hash cost"""
+        if message_size < 0:
+            raise ValueError("message_size must be non-negative")
+        if num_signatures < 1:
+            raise ValueError("num_signatures must be at least 1")
+        keypair = self.key_manager.generate_keypair()
+        # One entropy read, sliced into distinct messages outside the timed region
+        buffer = secrets.token_bytes(message_size * num_signatures)
+        messages = [buffer[i * message_size:(i + 1) * message_size]
+                    for i in range(num_signatures)]
+        sign = self.sm2.sign
+        private_key = keypair.private_key
+        
+        t0 = time.perf_counter_ns()
         
-        end_time = time.time()
-        total_time = end_time - start_time
+        for message in messages:
+            sign(message, private_key)
+        
+        total_time = (time.perf_counter_ns() - t0) / 1e9
         
         return {
             'total_time': total_time,
@@ -345,14 +613,15 @@ class SM2Benchmarker:
         keypair = self.key_manager.generate_keypair()
         message = secrets.token_bytes(message_size)
         signature = self.sm2.sign(message, keypair.private_key)
+        verify = self.sm2.verify
+        public_key = keypair.public_key
         
-        start_time = time.time()
+        t0 = time.perf_counter_ns()
         
         for _ in range(num_verifications):
-            self.sm2.verify(message, signature, keypair.public_key)
+            verify(message, signature, public_key)
         
-        end_time = time.time()
-        total_time = end_time - start_time
+        total_time = (time.perf_counter_ns() - t0) / 1e9
         
         return {
             'total_time': total_time,
@@ -369,6 +638,7 @@ class SM2Benchmarker:
             'key_generation': self.benchmark_key_generation(100),
             'signing_1kb': self.benchmark_signing(1024, 100),
             'signing_64kb': self.benchmark_signing(65536, 100),
+            'signing_varied_1kb': self.benchmark_signing_varied(1024, 100),
             'verification_1kb': self.benchmark_verification(1024, 100),
             'verification_64kb': self.benchmark_verification(65536, 100),
             'timestamp': time.time()
@@ -380,7 +650,7 @@ class SM2Validator:
     """SM2 cryptographic validation utilities"""
     
     def __init__(self):
-        self.sm2 = SM2()
+        self.sm2 = _default_sm2()
     
     def validate_private_key(self, private_key: int) -> bool:
         """Validate private key is in valid range"""
@@ -388,9 +658,16 @@ class SM2Validator:
     
     def validate_public_key(self, public_key: Point) -> bool:
         """Validate public key is on the curve"""
+        curve = self.sm2.curve
+        p = curve.p
         try:
-            return self.sm2.is_on_curve(public_key)
-        except:
+            if getattr(public_key, 'infinity', False):
+                return False
+            x, y = public_key.x, public_key.y
+            if not (0 <= x < p and 0 <= y < p):
+                return False
+            return (y * y - (x * x * x + curve.a * x + curve.b)) % p == 0
+        except (AttributeError, TypeError):
             return False
     
     def validate_signature(self, signature: Tuple[int, int]) -> bool:
@@ -400,52 +677,31 @@ class SM2Validator:
     
     def validate_curve_parameters(self, curve: CurveParams) -> bool:
         """Validate curve parameters"""
+        try:
+            key = (curve.p, curve.a, curve.b, curve.n, curve.gx, curve.gy)
+        except AttributeError:
+            return False
+        cached = _validated_curves.get(key)
+        if cached is not None:
+            return cached
+        
         # Check that curve equation is satisfied by generator point
         try:
-            left = pow(curve.gy, 2, curve.p)
-            right = (pow(curve.gx, 3, curve.p) + curve.a * curve.gx + curve.b) % curve.p
-            return left == right
+            p, gx, gy = curve.p, curve.gx, curve.gy
+            result = (gy * gy - (gx * gx * gx + curve.a * gx + curve.b)) % p == 0
         except:
             return False
+        _validated_curves[key] = result
+        return result
 
 class SM2Utils:
     """General SM2 utility functions"""
     
-    @staticmethod
-    def bytes_to_int(data: bytes) -> int:
-        """Convert bytes to integer"""
-        return int.from_bytes(data, byteorder='big')
-    
-    @staticmethod
-    def int_to_bytes(value: int, length: int = 32) -> bytes:
-        """Convert integer to bytes with specified length"""
-        return value.to_bytes(length, byteorder='big')
-    
-    @staticmethod
-    def point_to_bytes(point: Point, compressed: bool = False) -> bytes:
-        """Convert point to byte representation"""
-        if compressed:
-            prefix = 0x02 if point.y % 2 == 0 else 0x03
-            return bytes([prefix]) + SM2Utils.int_to_bytes(point.x, 32)
-        else:
-            return bytes([0x04]) + SM2Utils.int_to_bytes(point.x, 32) + SM2Utils.int_to_bytes(point.y, 32)
-    
-    @staticmethod
-    def bytes_to_point(data: bytes) -> Point:
-        """Convert byte representation to point"""
-        if len(data) == 33:  # Compressed
-            prefix = data[0]
-            x = SM2Utils.bytes_to_int(data[1:33])
-            # Decompress point (simplified - would need curve parameters)
-            raise NotImplementedError("Point decompression not implemented")
-        elif len(data) == 65:  # Uncompressed
-            if data[0] != 0x04:
-                raise ValueError("Invalid uncompressed point prefix")
-            x = SM2Utils.bytes_to_int(data[1:33])
-            y = SM2Utils.bytes_to_int(data[33:65])
-            return Point(x, y)
-        else:
-            raise ValueError("Invalid point data length")
+    # Thin aliases of the module-level helpers, kept for API compatibility
+    bytes_to_int = staticmethod(_bytes_to_int)
+    int_to_bytes = staticmethod(_int_to_bytes)
+    point_to_bytes = staticmethod(_point_to_bytes)
+    bytes_to_point = staticmethod(_bytes_to_point)
     
     @staticmethod
     def generate_random_message(length: int = 32) -> bytes:
@@ -456,8 +712,7 @@ class SM2Utils:
     def hash_message(message: bytes, algorithm: HashAlgorithm = HashAlgorithm.SM3) -> bytes:
         """Hash message with specified algorithm"""
         if algorithm == HashAlgorithm.SM3:
-            # Would use actual SM3 implementation
-            return hashlib.sha256(message).digest()  # Placeholder
+            return _sm3_digest(message)
         elif algorithm == HashAlgorithm.SHA256:
             return hashlib.sha256(message).digest()
         elif algorithm == HashAlgorithm.SHA384:
@@ -487,7 +742,7 @@ def demo_utilities():
     print("\n2. Signature Verification:")
     verifier = SM2SignatureVerifier()
     message = b"Hello, SM2 World!"
-    sm2 = SM2()
+    sm2 = _default_sm2()
     signature = sm2.sign(message, keypair.private_key)
     is_valid = verifier.verify_signature(message, signature, keypair.public_key)
     print(f"   Message: {message.decode()}")
@@ -0,0 +1,148 @@
+"""
+SM2 signature utility tests
+
+Signatures produced by SM2Basic must be accepted by the batch verifiers in sm2_utils.
+"""
+
+import base64
+import json
+import os
+import secrets
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.sm2_basic import SM2Basic, SM2Point
+from src.sm2_utils import SM2Benchmarker, SM2KeyManager, SM2SignatureVerifier, SM2Validator, _derive_fernet_key
+
+
+class TestBatchVerification(unittest.TestCase):
+    """Batch verification against SM2Basic signatures"""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.sm2 = SM2Basic()
+        cls.verifier = SM2SignatureVerifier()
+        cls.entries = []
+        for i in range(3):
+            private_key, public_key = cls.sm2.generate_keypair()
+            message = f"message {i}".encode()
+            user_id = b"ALICE123@YAHOO.COM" if i == 2 else b"1234567812345678"
+            cls.entries.append({
+                'message': message,
+                'signature': cls.sm2.sign(message, private_key, user_id),
+                'public_key': public_key,
+                'user_id': user_id,
+            })
+    
+    def test_fast_batch_accepts_valid_signatures(self):
+        """batch_verify_signatures_fast accepts what SM2Basic signed"""
+        self.assertEqual(self.verifier.batch_verify_signatures_fast(self.entries),
+                         [True] * len(self.entries))
+    
+    def test_fast_batch_matches_single_verify(self):
+        """Tampered entries are rejected exactly as SM2Basic.verify rejects them"""
+        tampered = [dict(entry) for entry in self.entries]
+        tampered[0]['message'] = b"forged"
+        r, s = tampered[1]['signature']
+        tampered[1]['signature'] = (r, s + 1)
+        tampered[2]['user_id'] = b"1234567812345678"
+        
+        expected = [self.sm2.verify(e['message'], e['signature'], e['public_key'], e['user_id'])
+                    for e in tampered]
+        self.assertEqual(expected, [False, False, False])
+        self.assertEqual(self.verifier.batch_verify_signatures_fast(tampered), expected)
+    
+    def test_batch_verify_signatures(self):
+        """The structure-of-arrays batch path agrees with the fast path"""
+        self.assertEqual(self.verifier.batch_verify_signatures(self.entries),
+                         self.verifier.batch_verify_signatures_fast(self.entries))
+
+
+
+class TestKeyEncryption(unittest.TestCase):
+    """Password-protected JSON key exports"""
+    
+    def setUp(self):
+        self.manager = SM2KeyManager()
+        self.keypair = self.manager.generate_keypair()
+        self.data = self.keypair.to_dict()
+    
+    def test_roundtrip(self):
+        """Current exports decrypt back to the original key data"""
+        encrypted = self.manager._encrypt_key_data(self.data, "secret")
+        self.assertEqual(self.manager._decrypt_key_data(encrypted, "secret"), self.data)
+    
+    def test_key_derivation_matches_pbkdf2hmac(self):
+        """hashlib-based derivation agrees with cryptography's PBKDF2HMAC"""
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+        
+        salt = secrets.token_bytes(16)
+        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=100000)
+        expected = base64.urlsafe_b64encode(kdf.derive(b"secret"))
+        self.assertEqual(_derive_fernet_key("secret", salt), expected)
+    
+    def test_decrypt_legacy_export(self):
+        """Exports whose Fernet token is wrapped in an extra base64 layer still decrypt"""
+        from cryptography.fernet import Fernet
+        
+        salt = secrets.token_bytes(16)
+        token = Fernet(_derive_fernet_key("secret", salt)).encrypt(json.dumps(self.data).encode())
+        legacy = {
+            'encrypted': True,
+            'salt': base64.b64encode(salt).decode(),
+            'data': base64.b64encode(token).decode()
+        }
+        self.assertEqual(self.manager._decrypt_key_data(legacy, "secret"), self.data)
+
+
+
+class TestPublicKeyValidation(unittest.TestCase):
+    """SM2Validator.validate_public_key"""
+    
+    def setUp(self):
+        self.validator = SM2Validator()
+        self.sm2 = self.validator.sm2
+    
+    def test_accepts_generator(self):
+        """The base point is a valid public key"""
+        self.assertTrue(self.validator.validate_public_key(self.sm2.G))
+    
+    def test_rejects_unreduced_coordinates(self):
+        """x + p satisfies the curve equation mod p but is not a valid coordinate"""
+        G = self.sm2.G
+        self.assertFalse(self.validator.validate_public_key(SM2Point(G.x + self.sm2.p, G.y)))
+        self.assertFalse(self.validator.validate_public_key(SM2Point(G.x, G.y - self.sm2.p)))
+    
+    def test_rejects_infinity_and_malformed(self):
+        """The point at infinity and non-point inputs are rejected"""
+        self.assertFalse(self.validator.validate_public_key(SM2Point(0, 0, infinity=True)))
+        self.assertFalse(self.validator.validate_public_key(None))
+        self.assertFalse(self.validator.validate_public_key(SM2Point("x", "y")))
+
+
+
+class TestBenchmarker(unittest.TestCase):
+    """SM2Benchmarker argument handling"""
+    
+    def setUp(self):
+        self.benchmarker = SM2Benchmarker()
+    
+    def test_signing_varied_empty_messages(self):
+        """message_size=0 signs the requested number of empty messages"""
+        result = self.benchmarker.benchmark_signing_varied(message_size=0, num_signatures=2)
+        self.assertEqual(result['message_size'], 0)
+        self.assertGreater(result['signatures_per_second'], 0)
+    
+    def test_signing_varied_rejects_bad_arguments(self):
+        """Zero signatures or a negative size raise ValueError"""
+        with self.assertRaises(ValueError):
+            self.benchmarker.benchmark_signing_varied(message_size=16, num_signatures=0)
+        with self.assertRaises(ValueError):
+            self.benchmarker.benchmark_signing_varied(message_size=-1, num_signatures=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,11 +4,18 @@ DDH-PSI协议性能基准测试
 对协议的各个组件和整体性能进行详细测试和分析
 """
 
+import gc
+import itertools
 import time
-import statistics
+import timeit
+import multiprocessing
+import shutil
+import subprocess
 import sys
 import os
-from typing import List, Tuple, Dict
+from typing import Callable, List, Tuple, Dict
+
+import numpy as np
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
@@ -17,12 +24,155 @@ from elliptic_curve import EllipticCurveGroup
 from paillier_encryption import PaillierEncryption
 
 
+def _reexec_under_pypy() -> None:
+    """
+    若当前为CPython且系统中存在可用的pypy3，则改用PyPy重新执行本脚本
+    
+    协议实现是纯Python大整数运算，PyPy的JIT对这类循环收益明显。
+    仅当pypy3能导入numpy、cryptography及src包时才切换，否则继续使用CPython。
+    设置环境变量DDH_PSI_NO_PYPY=1可禁用该行为。
+    """
+    if ('__pypy__' in sys.builtin_module_names
+            or os.environ.get('DDH_PSI_NO_PYPY') == '1'):
+        return
+    pypy = shutil.which('pypy3')
+    if not pypy:
+        return
+    
+    # 先探测PyPy环境能否导入基准测试的全部依赖
+    project_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    probe = subprocess.run([pypy, '-c', 'import numpy, cryptography, src'],
+                           cwd=project_root, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL)
+    if probe.returncode != 0:
+        return
+    
+    # 防止PyPy环境异常时反复切换
+    os.environ['DDH_PSI_NO_PYPY'] = '1'
+    os.execv(pypy, [pypy, os.path.abspath(__file__)] + sys.argv[1:])
+
+
+def uid(i: int, prefix: bytes = b"user") -> bytes:
+    """
+    生成测试用标识符：前缀 || 4字节大端序号
+    
+    直接拼接字节串，省去f-string格式化和UTF-8编码，且正是哈希到曲线所需的输入
+    
+    Args:
+        i: 序号
+        prefix: 标识符前缀
+        
+    Returns:
+        字节串标识符
+    """
+    return prefix + i.to_bytes(4, 'big')
+
+
+def _warmup(fn: Callable[[], object], k: int = 50) -> None:
+    """
+    预热被测操作：填充缓存（如基点预计算表）并让PyPy等JIT完成编译
+    
+    Args:
+        fn: 被测操作
+        k: 预热次数
+    """
+    for _ in range(k):
+        fn()
+
+
+def _bench(fn: Callable[[], object], n: int, repeat: int = 5) -> float:
+    """
+    使用timeit计时，返回单次操作的最短时间（毫秒）
+    
+    先由Timer.autorange自适应确定每轮执行次数以克服时钟分辨率（不超过
+    n // repeat，使总操作量不超过n），再重复repeat轮取最小值以排除调度
+    抖动。timeit在计时期间会自动关闭GC，内层循环也在C中执行。
+    
+    Args:
+        fn: 被测操作
+        n: 操作次数上限
+        repeat: 重复轮数
+        
+    Returns:
+        单次操作的最短时间（毫秒）
+    """
+    _warmup(fn, min(50, n))
+    gc.collect()
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, min(number, n // repeat))
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1000
+
+
+def _run_once(args: Tuple[List[str], List[Tuple[str, int]], EllipticCurveGroup,
+                          PaillierEncryption]) -> Tuple[float, int, int]:
+    """
+    执行一次完整协议并计时（模块级函数，便于进程池序列化）
+    
+    Args:
+        args: (Party1数据, Party2数据, 共享椭圆曲线群, 已生成密钥的Paillier实例)
+        
+    Returns:
+        (耗时毫秒, 交集大小, 交集总和)
+    """
+    party1_data, party2_data, ec_group, paillier = args
+    start = time.perf_counter()
+    intersection_size, intersection_sum = DDHPSIProtocol.run_protocol(
+        party1_data, party2_data, ec_group=ec_group, paillier=paillier
+    )
+    return (time.perf_counter() - start) * 1000, intersection_size, intersection_sum
+
+
+def _run_size(args: Tuple[List[str], List[Tuple[str, int]], bool,
+                          PaillierEncryption, int]) -> List[Tuple[float, int, int]]:
+    """
+    依次执行某一数据规模下的全部重复运行（模块级函数，便于进程池序列化）
+    
+    同一规模的各次运行在同一进程内顺序计时，互不争用CPU；只传递后端开关，
+    椭圆曲线群在当前进程中构建一次并在各次运行间共享
+    
+    Args:
+        args: (Party1数据, Party2数据, 是否使用OpenSSL后端, 已生成密钥的Paillier实例, 运行次数)
+        
+    Returns:
+        每次运行的 (耗时毫秒, 交集大小, 交集总和)
+    """
+    party1_data, party2_data, use_openssl, paillier, num_runs = args
+    ec_group = EllipticCurveGroup(use_openssl=use_openssl)
+    return [_run_once((party1_data, party2_data, ec_group, paillier)) for _ in range(num_runs)]
+
+
+# 协议扩展性测试结果的结构化数组布局（每个数据规模一行）
+SCALABILITY_DTYPE = np.dtype([
+    ('size', 'i8'),
+    ('average_time_ms', 'f8'),
+    ('std_deviation_ms', 'f8'),
+    ('throughput_ops_per_sec', 'f8'),
+    ('time_per_element_ms', 'f8'),
+])
+
+
+def scalability_to_dict(results: np.ndarray) -> Dict[int, Dict[str, float]]:
+    """
+    将扩展性结构化数组转换为以规模为键的字典（便于JSON序列化）
+    
+    Args:
+        results: SCALABILITY_DTYPE结构化数组
+        
+    Returns:
+        {规模: {指标名: 值}}
+    """
+    fields = results.dtype.names[1:]
+    return {int(row['size']): {name: float(row[name]) for name in fields}
+            for row in results}
+
+
 class DDHPSIBenchmark:
     """DDH-PSI协议性能基准测试器"""
     
     def __init__(self):
         self.ec_group = EllipticCurveGroup()
-        self.paillier = PaillierEncryption()
+        self.paillier = None  # 首次需要时生成密钥对，避免重复的密钥生成
         
     def benchmark_elliptic_curve_operations(self, num_operations: int = 1000) -> Dict[str, float]:
         """
@@ -39,40 +189,40 @@ class DDHPSIBenchmark:
         results = {}
         
         # 测试私钥生成
-        times = []
-        for _ in range(num_operations):
-            start = time.time()
-            self.ec_group.generate_private_key()
-            times.append((time.time() - start) * 1000)
-        results['private_key_generation'] = statistics.mean(times)
+        results['private_key_generation'] = _bench(
+            self.ec_group.generate_private_key, num_operations)
+        
+        # 测试批量私钥生成（一次读取全部随机字节）
+        start = time.perf_counter_ns()
+        self.ec_group.generate_private_key_batch(num_operations)
+        results['private_key_generation_batch'] = (
+            (time.perf_counter_ns() - start) / num_operations / 1e6)
         
         # 测试公钥生成
         private_key = self.ec_group.generate_private_key()
-        times = []
-        for _ in range(num_operations):
-            start = time.time()
-            self.ec_group.generate_public_key(private_key)
-            times.append((time.time() - start) * 1000)
-        results['public_key_generation'] = statistics.mean(times)
+        results['public_key_generation'] = _bench(
+            lambda: self.ec_group.generate_public_key(private_key), num_operations)
         
         # 测试点加法
         G = self.ec_group.G
         point2 = self.ec_group.scalar_mult(2, G)
-        times = []
-        for _ in range(num_operations):
-            start = time.time()
-            self.ec_group.point_add(G, point2)
-            times.append((time.time() - start) * 1000)
-        results['point_addition'] = statistics.mean(times)
-        
-        # 测试标量乘法
-        scalar = self.ec_group.generate_private_key()
-        times = []
-        for _ in range(num_operations):
-            start = time.time()
-            self.ec_group.scalar_mult(scalar, G)
-            times.append((time.time() - start) * 1000)
-        results['scalar_multiplication'] = statistics.mean(times)
+        results['point_addition'] = _bench(
+            lambda: self.ec_group.point_add(G, point2), num_operations)
+        
+        # 测试标量乘法（基点G使用固定窗口预计算表）
+        # 预先生成互不相同的标量并轮流使用，避免反复计算同一标量
+        scalars = self.ec_group.generate_private_key_batch(num_operations)
+        next_scalar = itertools.cycle(scalars).__next__
+        results['scalar_multiplication'] = _bench(
+            lambda: self.ec_group.scalar_mult_base(next_scalar()), num_operations)
+        
+        # 测试批量标量乘法（整批一次调用）
+        batch_scalars = self.ec_group.generate_private_key_batch(num_operations)
+        batch_points = [G] * num_operations
+        start = time.perf_counter_ns()
+        self.ec_group.scalar_mult_batch(batch_scalars, batch_points)
+        results['scalar_multiplication_batch'] = (
+            (time.perf_counter_ns() - start) / num_operations / 1e6)
         
         # 输出结果
         for op, avg_time in results.items():
@@ -95,52 +245,41 @@ class DDHPSIBenchmark:
         results = {}
         
         # 测试密钥生成
-        times = []
-        for _ in range(10):  # 密钥生成较慢，测试较少次数
-            paillier = PaillierEncryption()
-            start = time.time()
-            paillier.generate_keypair()
-            times.append((time.time() - start) * 1000)
-        results['keypair_generation'] = statistics.mean(times)
+        # 素数搜索耗时波动大，取平均值；密钥生成较慢，测试较少次数
+        paillier = PaillierEncryption()
+        times = timeit.Timer(paillier.generate_keypair).repeat(repeat=10, number=1)
+        results['keypair_generation'] = float(np.mean(times)) * 1000
         
-        # 为后续测试生成密钥对
-        public_key, private_key = self.paillier.generate_keypair()
+        # 直接沿用最后一次计时生成的密钥对进行后续测试
+        self.paillier = paillier
+        public_key, private_key = paillier.public_key, paillier.private_key
         
         # 测试加密
         plaintext = 12345
-        times = []
-        for _ in range(num_operations):
-            start = time.time()
-            self.paillier.encrypt(plaintext, public_key)
-            times.append((time.time() - start) * 1000)
-        results['encryption'] = statistics.mean(times)
+        results['encryption'] = _bench(
+            lambda: self.paillier.encrypt(plaintext, public_key), num_operations)
+        
+        # 测试批量加密（整批一次调用）
+        batch_plaintexts = [plaintext] * num_operations
+        start = time.perf_counter_ns()
+        self.paillier.batch_encrypt(batch_plaintexts, public_key)
+        results['batch_encryption'] = (
+            (time.perf_counter_ns() - start) / num_operations / 1e6)
         
         # 测试解密
         ciphertext = self.paillier.encrypt(plaintext, public_key)
-        times = []
-        for _ in range(num_operations):
-            start = time.time()
-            self.paillier.decrypt(ciphertext, private_key)
-            times.append((time.time() - start) * 1000)
-        results['decryption'] = statistics.mean(times)
+        results['decryption'] = _bench(
+            lambda: self.paillier.decrypt(ciphertext, private_key), num_operations)
         
         # 测试同态加法
         c1 = self.paillier.encrypt(100, public_key)
         c2 = self.paillier.encrypt(200, public_key)
-        times = []
-        for _ in range(num_operations):
-            start = time.time()
-            self.paillier.add_ciphertexts(c1, c2, public_key)
-            times.append((time.time() - start) * 1000)
-        results['homomorphic_addition'] = statistics.mean(times)
+        results['homomorphic_addition'] = _bench(
+            lambda: self.paillier.add_ciphertexts(c1, c2, public_key), num_operations)
         
         # 测试重随机化
-        times = []
-        for _ in range(num_operations):
-            start = time.time()
-            self.paillier.refresh_ciphertext(ciphertext, public_key)
-            times.append((time.time() - start) * 1000)
-        results['ciphertext_refresh'] = statistics.mean(times)
+        results['ciphertext_refresh'] = _bench(
+            lambda: self.paillier.refresh_ciphertext(ciphertext, public_key), num_operations)
         
         # 输出结果
         for op, avg_time in results.items():
@@ -148,52 +287,61 @@ class DDHPSIBenchmark:
         
         return results
     
-    def benchmark_protocol_scalability(self, sizes: List[int]) -> Dict[int, Dict[str, float]]:
+    def benchmark_protocol_scalability(self, sizes: List[int],
+                                       parallel: bool = True) -> np.ndarray:
         """
         测试协议在不同数据规模下的性能
         
         Args:
             sizes: 数据集大小列表
+            parallel: 是否用进程池并行执行不同规模（进程数不超过CPU核数），
+                同一规模的重复运行始终在一个进程内顺序计时
             
         Returns:
-            各规模下的性能数据
+            各规模下的性能数据（SCALABILITY_DTYPE结构化数组，每个规模一行）
         """
         print(f"\\n=== 协议扩展性测试 ===")
         
-        results = {}
-        
-        for size in sizes:
+        results = np.zeros(len(sizes), dtype=SCALABILITY_DTYPE)
+        num_runs = 3
+        
+        # 预先生成一次Paillier密钥对并在所有运行中复用，计时只包含协议本身
+        if self.paillier is None:
+            self.paillier = PaillierEncryption()
+            self.paillier.generate_keypair()
+        shared_paillier = self.paillier
+        
+        # 按最大规模一次性生成测试数据，各规模取前缀切片
+        max_size = max(sizes, default=0)
+        all_party1_data = [uid(i) for i in range(max_size)]
+        all_party2_data = [(uid(i), i * 10) for i in range(0, max_size, 2)]  # 50%交集
+        
+        # 偶数下标i < size的元素恰为前(size+1)//2个
+        size_args = [(all_party1_data[:size], all_party2_data[:(size + 1) // 2],
+                      self.ec_group.use_openssl, shared_paillier, num_runs) for size in sizes]
+        if parallel and sizes:
+            processes = min(len(sizes), os.cpu_count() or 1)
+            with multiprocessing.Pool(processes) as pool:
+                size_runs = pool.map(_run_size, size_args)
+        else:
+            size_runs = [_run_size(args) for args in size_args]
+        
+        for row, (size, runs) in enumerate(zip(sizes, size_runs)):
             print(f"\\n测试数据规模: {size}")
             
-            # 生成测试数据
-            party1_data = [f"user{i}" for i in range(size)]
-            party2_data = [(f"user{i}", i * 10) for i in range(0, size, 2)]  # 50%交集
-            
-            # 多次运行取平均值
-            times = []
-            for run in range(3):
-                start = time.time()
-                intersection_size, intersection_sum = DDHPSIProtocol.run_protocol(
-                    party1_data, party2_data
-                )
-                elapsed = (time.time() - start) * 1000
-                times.append(elapsed)
-                
+            times = np.empty(num_runs, dtype=np.float64)
+            for run, (elapsed, intersection_size, intersection_sum) in enumerate(runs):
+                times[run] = elapsed
                 print(f"  运行 {run+1}: {elapsed:.2f} ms (交集: {intersection_size}, 总和: {intersection_sum})")
             
-            avg_time = statistics.mean(times)
-            std_time = statistics.stdev(times) if len(times) > 1 else 0
+            avg_time = float(np.mean(times))
+            std_time = float(np.std(times, ddof=1)) if len(times) > 1 else 0.0
             
-            results[size] = {
-                'average_time_ms': avg_time,
-                'std_deviation_ms': std_time,
-                'throughput_ops_per_sec': size / (avg_time / 1000),
-                'time_per_element_ms': avg_time / size
-            }
+            results[row] = (size, avg_time, std_time, size / (avg_time / 1000), avg_time / size)
             
             print(f"  平均时间: {avg_time:.2f} ± {std_time:.2f} ms")
-            print(f"  吞吐量: {results[size]['throughput_ops_per_sec']:.2f} ops/sec")
-            print(f"  每元素时间: {results[size]['time_per_element_ms']:.3f} ms")
+            print(f"  吞吐量: {results[row]['throughput_ops_per_sec']:.2f} ops/sec")
+            print(f"  每元素时间: {results[row]['time_per_element_ms']:.3f} ms")
         
         return results
     
@@ -209,41 +357,45 @@ class DDHPSIBenchmark:
         """
         print(f"\\n=== 通信开销分析 ===")
         
-        results = {}
+        # 椭圆曲线点大小：65字节（未压缩格式）
+        ec_point_size = 65
         
-        for size in sizes:
-            print(f"\\n数据规模: {size}")
-            
-            # 椭圆曲线点大小：65字节（未压缩格式）
-            ec_point_size = 65
-            
-            # Paillier密文大小：通常为768字节（1024位密钥）
-            paillier_ciphertext_size = 128  # 简化估计
-            
-            # 第一轮：Party1发送m1个椭圆曲线点
-            round1_bytes = size * ec_point_size
-            
-            # 第二轮：Party2发送m1个椭圆曲线点 + m2个(椭圆曲线点 + 密文)对
-            round2_bytes = size * ec_point_size + size * (ec_point_size + paillier_ciphertext_size)
-            
-            # 第三轮：Party1发送1个密文
-            round3_bytes = paillier_ciphertext_size
-            
-            total_bytes = round1_bytes + round2_bytes + round3_bytes
-            
-            results[size] = {
-                'round1_bytes': round1_bytes,
-                'round2_bytes': round2_bytes,
-                'round3_bytes': round3_bytes,
-                'total_bytes': total_bytes,
-                'bytes_per_element': total_bytes / size
+        # Paillier密文大小：通常为768字节（1024位密钥）
+        paillier_ciphertext_size = 128  # 简化估计
+        
+        # 所有规模一次性向量化计算
+        sizes_arr = np.asarray(sizes, dtype=np.int64)
+        
+        # 第一轮：Party1发送m1个椭圆曲线点
+        round1 = sizes_arr * ec_point_size
+        
+        # 第二轮：Party2发送m1个椭圆曲线点 + m2个(椭圆曲线点 + 密文)对
+        round2 = sizes_arr * ec_point_size + sizes_arr * (ec_point_size + paillier_ciphertext_size)
+        
+        # 第三轮：Party1发送1个密文
+        round3 = np.full_like(sizes_arr, paillier_ciphertext_size)
+        
+        total = round1 + round2 + round3
+        per_element = total / sizes_arr
+        
+        results = {
+            int(size): {
+                'round1_bytes': int(r1),
+                'round2_bytes': int(r2),
+                'round3_bytes': int(r3),
+                'total_bytes': int(t),
+                'bytes_per_element': float(pe)
             }
-            
-            print(f"  第一轮通信: {round1_bytes:,} 字节")
-            print(f"  第二轮通信: {round2_bytes:,} 字节")
-            print(f"  第三轮通信: {round3_bytes:,} 字节")
-            print(f"  总通信量: {total_bytes:,} 字节 ({total_bytes/1024:.1f} KB)")
-            print(f"  每元素开销: {results[size]['bytes_per_element']:.1f} 字节")
+            for size, r1, r2, r3, t, pe in zip(sizes_arr, round1, round2, round3, total, per_element)
+        }
+        
+        for size, data in results.items():
+            print(f"\\n数据规模: {size}")
+            print(f"  第一轮通信: {data['round1_bytes']:,} 字节")
+            print(f"  第二轮通信: {data['round2_bytes']:,} 字节")
+            print(f"  第三轮通信: {data['round3_bytes']:,} 字节")
+            print(f"  总通信量: {data['total_bytes']:,} 字节 ({data['total_bytes']/1024:.1f} KB)")
+            print(f"  每元素开销: {data['bytes_per_element']:.1f} 字节")
         
         return results
     
@@ -272,12 +424,12 @@ class DDHPSIBenchmark:
         return {
             'elliptic_curve': ec_results,
             'paillier': paillier_results,
-            'scalability': scalability_results,
+            'scalability': scalability_to_dict(scalability_results),
             'communication': communication_results
         }
     
     def generate_performance_report(self, ec_results: Dict, paillier_results: Dict,
-                                  scalability_results: Dict, communication_results: Dict):
+                                  scalability_results: np.ndarray, communication_results: Dict):
         """生成性能报告"""
         print(f"\\n\\n=== 性能报告总结 ===")
         
@@ -291,9 +443,9 @@ class DDHPSIBenchmark:
         print(f"   - 解密操作: {paillier_results['decryption']:.3f} ms")
         
         print(f"\\n3. 协议扩展性:")
-        for size, data in scalability_results.items():
-            print(f"   - {size:4d} 元素: {data['average_time_ms']:7.1f} ms, "
-                  f"{data['throughput_ops_per_sec']:6.1f} ops/sec")
+        for row in scalability_results:
+            print(f"   - {row['size']:4d} 元素: {row['average_time_ms']:7.1f} ms, "
+                  f"{row['throughput_ops_per_sec']:6.1f} ops/sec")
         
         print(f"\\n4. 通信效率:")
         for size, data in communication_results.items():
@@ -304,8 +456,9 @@ class DDHPSIBenchmark:
         print(f"\\n5. 实际部署估算 (100,000 元素):")
         
         # 基于1000元素的性能线性外推
-        if 1000 in scalability_results:
-            base_time = scalability_results[1000]['average_time_ms']
+        base_rows = scalability_results['average_time_ms'][scalability_results['size'] == 1000]
+        if base_rows.size:
+            base_time = base_rows[0]
             estimated_time_100k = base_time * 100  # 线性扩展估算
             print(f"   - 预估执行时间: {estimated_time_100k/1000:.1f} 秒")
         
@@ -317,5 +470,6 @@ class DDHPSIBenchmark:
 
 
 if __name__ == '__main__':
+    _reexec_under_pypy()
     benchmark = DDHPSIBenchmark()
     results = benchmark.run_comprehensive_benchmark()
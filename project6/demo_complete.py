@@ -106,12 +106,14 @@ def demo_performance_analysis():
     
     print_step(1, "不同数据规模的性能测试")
     
+    # 协议不保存跨运行状态，所有规模共用一个实例
+    protocol = DDHPSIProtocol()
+    
     for size in sizes:
         # 生成测试数据
-        party1_data = [f"item_{i}" for i in range(size)]
-        party2_data = [(f"item_{i}", i*10) for i in range(0, size, 2)]  # 50%交集
-        
-        protocol = DDHPSIProtocol()
+        # 字节串标识符：省去格式化与编码，直接作为哈希输入
+        party1_data = [b"item_" + i.to_bytes(4, 'big') for i in range(size)]
+        party2_data = [(b"item_" + i.to_bytes(4, 'big'), i*10) for i in range(0, size, 2)]  # 50%交集
         
         # 性能测试
         start_time = time.time()
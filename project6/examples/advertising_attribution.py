@@ -6,8 +6,9 @@
 
 import sys
 import os
-import random
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+import numpy as np
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
@@ -17,13 +18,27 @@ from ddh_psi import DDHPSIProtocol
 class AdvertisingAttributionDemo:
     """广告转化归因演示"""
     
-    def __init__(self):
-        self.ad_platform_data = []  # 广告平台数据（看过广告的用户）
-        self.ecommerce_data = []    # 电商平台数据（购买用户及金额）
+    def __init__(self, seed: Optional[int] = 0xC0FFEE):
+        """
+        Args:
+            seed: 随机数生成器种子，固定种子使示例数据可复现（None为不固定）
+        """
+        self.rng = np.random.default_rng(seed)
+        # 用户以64位整数ID表示，协议内部直接按8字节编码哈希到曲线
+        self.ad_platform_data = np.empty(0, dtype=np.uint64)  # 广告平台数据（看过广告的用户）
+        # 电商平台数据（购买用户及金额），按列分别存储
+        self.ecommerce_user_ids = np.empty(0, dtype=np.uint64)
+        self.ecommerce_amounts = np.empty(0, dtype=np.int32)
+    
+    @property
+    def ecommerce_data(self) -> List[Tuple[int, int]]:
+        """电商平台数据的(用户ID, 金额)元组视图，仅在交给协议时按需组装"""
+        return list(zip(self.ecommerce_user_ids.tolist(), self.ecommerce_amounts.tolist()))
     
     def generate_sample_data(self, num_ad_viewers: int = 1000, 
                            num_purchasers: int = 200,
-                           overlap_rate: float = 0.3) -> Tuple[List[str], List[Tuple[str, int]]]:
+                           overlap_rate: float = 0.3,
+                           seed: Optional[int] = None) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
         """
         生成示例数据模拟真实场景
         
@@ -31,58 +46,65 @@ class AdvertisingAttributionDemo:
             num_ad_viewers: 看过广告的用户数量
             num_purchasers: 购买用户数量  
             overlap_rate: 交集比例（归因率）
+            seed: 本次生成单独使用的种子（None时使用实例共享的生成器）
             
         Returns:
-            (广告平台数据, 电商平台数据)
+            (广告平台数据, 电商平台数据)，广告平台数据为只读数组，不做拷贝
         """
         print(f"生成示例数据:")
         print(f"  - 广告观看用户: {num_ad_viewers:,}")
         print(f"  - 购买用户: {num_purchasers:,}")
         print(f"  - 预期归因率: {overlap_rate:.1%}")
         
-        # 生成基础用户ID池
-        all_users = [f"user_{i:06d}" for i in range(num_ad_viewers + num_purchasers)]
-        random.shuffle(all_users)
+        rng = self.rng if seed is None else np.random.default_rng(seed)
+        
+        # 生成基础用户ID池（整数ID，打乱顺序）
+        all_ids = rng.permutation(num_ad_viewers + num_purchasers).astype(np.uint64)
         
         # 广告平台数据：看过广告的用户ID
-        self.ad_platform_data = all_users[:num_ad_viewers]
+        ad_ids = all_ids[:num_ad_viewers]
         
         # 计算交集大小
         overlap_size = int(num_purchasers * overlap_rate)
         
         # 电商平台数据：购买用户及消费金额
-        # 一部分用户来自广告观看者（归因用户）
-        attributed_users = random.sample(self.ad_platform_data, overlap_size)
+        # 一部分用户来自广告观看者（归因用户），其余用户是非归因用户
+        # 只对下标抽样再花式索引，不复制被抽样的ID数组
+        non_viewer_ids = all_ids[num_ad_viewers:]
+        attributed_ids = ad_ids[rng.choice(num_ad_viewers, size=overlap_size, replace=False)]
+        non_attributed_ids = non_viewer_ids[
+            rng.choice(non_viewer_ids.size, size=num_purchasers - overlap_size, replace=False)
+        ]
+        purchaser_ids = np.concatenate([attributed_ids, non_attributed_ids])
         
-        # 其余用户是非归因用户
-        non_attributed_users = random.sample(
-            all_users[num_ad_viewers:], num_purchasers - overlap_size
-        )
+        # 生成消费金额：归因用户（可能消费更高）100-1000元，非归因用户50-500元
+        amounts = np.concatenate([
+            rng.integers(100, 1001, size=overlap_size),
+            rng.integers(50, 501, size=num_purchasers - overlap_size),
+        ])
         
-        # 生成购买数据（用户ID + 消费金额）
-        self.ecommerce_data = []
+        # 打乱顺序
+        order = rng.permutation(num_purchasers)
+        purchaser_ids = purchaser_ids[order]
+        amounts = amounts[order]
         
-        # 归因用户（可能消费更高）
-        for user in attributed_users:
-            amount = random.randint(100, 1000)  # 100-1000元
-            self.ecommerce_data.append((user, amount))
+        self.ad_platform_data = ad_ids
+        self.ecommerce_user_ids = purchaser_ids
+        self.ecommerce_amounts = amounts.astype(np.int32)
         
-        # 非归因用户
-        for user in non_attributed_users:
-            amount = random.randint(50, 500)   # 50-500元
-            self.ecommerce_data.append((user, amount))
+        # 设为只读后直接返回内部数组，调用方的修改会报错而无需防御性拷贝
+        for arr in (self.ad_platform_data, self.ecommerce_user_ids, self.ecommerce_amounts):
+            arr.setflags(write=False)
         
-        # 打乱顺序
-        random.shuffle(self.ecommerce_data)
-        
-        return self.ad_platform_data.copy(), self.ecommerce_data.copy()
+        return self.ad_platform_data, self.ecommerce_data
     
-    def run_attribution_analysis(self, verbose: bool = True) -> dict:
+    def run_attribution_analysis(self, verbose: bool = True, mode: str = "ddh") -> dict:
         """
         运行广告归因分析
         
         Args:
             verbose: 是否显示详细信息
+            mode: 协议模式，"ddh"为隐私保护协议，"plain"为明文求交
             
         Returns:
             归因分析结果
@@ -90,17 +112,23 @@ class AdvertisingAttributionDemo:
         if verbose:
             print(f"\\n=== 开始广告归因分析 ===")
         
-        # 执行DDH-PSI协议
-        attributed_users, total_attributed_revenue = DDHPSIProtocol.run_protocol(
-            self.ad_platform_data, 
-            self.ecommerce_data,
-            verbose=verbose
-        )
+        if mode == "plain":
+            # 明文模式直接在列数组上向量化求交，无需组装元组
+            attributed_users, total_attributed_revenue = self._attribute_plain()
+        else:
+            # 执行DDH-PSI协议
+            attributed_users, total_attributed_revenue = DDHPSIProtocol.run_protocol(
+                self.ad_platform_data, 
+                self.ecommerce_data,
+                verbose=verbose,
+                mode=mode,
+                aggregate_mode="batched"
+            )
         
         # 计算分析指标
         total_ad_viewers = len(self.ad_platform_data)
-        total_purchasers = len(self.ecommerce_data)
-        total_revenue = sum(amount for _, amount in self.ecommerce_data)
+        total_purchasers = self.ecommerce_amounts.size
+        total_revenue = int(self.ecommerce_amounts.sum())
         
         attribution_rate = attributed_users / total_ad_viewers if total_ad_viewers > 0 else 0
         conversion_rate = attributed_users / total_purchasers if total_purchasers > 0 else 0
@@ -126,6 +154,16 @@ class AdvertisingAttributionDemo:
         
         return results
     
+    def _attribute_plain(self) -> Tuple[int, int]:
+        """
+        明文归因计数：用np.isin在整数ID数组上求交集掩码后求和
+        
+        Returns:
+            (归因用户数, 归因收入)
+        """
+        mask = np.isin(self.ecommerce_user_ids, self.ad_platform_data)
+        return int(np.count_nonzero(mask)), int(self.ecommerce_amounts[mask].sum())
+    
     def print_attribution_report(self, results: dict):
         """打印归因分析报告"""
         print(f"\\n=== 广告归因分析报告 ===")
@@ -173,17 +211,19 @@ class AdvertisingAttributionDemo:
         
         comparison_results = []
         
-        for scenario in scenarios:
+        for index, scenario in enumerate(scenarios):
             print(f"\\n--- {scenario['name']} ---")
             
-            # 生成数据并运行分析
+            # 生成数据并运行分析（每个场景单独设种，结果可复现）
             self.generate_sample_data(
                 scenario['viewers'], 
                 scenario['purchasers'], 
-                scenario['overlap']
+                scenario['overlap'],
+                seed=index
             )
             
-            result = self.run_attribution_analysis(verbose=False)
+            # 对比分析的数据均在本地生成，无需密码学保护，使用明文求交快速得到结果
+            result = self.run_attribution_analysis(verbose=False, mode="plain")
             result['scenario_name'] = scenario['name']
             comparison_results.append(result)
             
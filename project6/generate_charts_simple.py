@@ -3,33 +3,61 @@ DDH-PSI协议性能分析图表生成器（简化版）
 生成专业的英文图表，用于性能分析和论文展示
 """
 
+import matplotlib
+matplotlib.use('Agg')  # 仅输出文件；工作进程中也避免GUI后端
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+import functools
+import multiprocessing
 import os
 
-# 设置图表样式
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
+# 图表样式：seaborn主题 + 英文字体设置。不在导入时修改全局rcParams，
+# 而是在每个图表方法内通过style.context临时应用，避免工作进程间的rc参数污染
+CHART_STYLE = [
+    'seaborn-v0_8',
+    {
+        'font.family': 'DejaVu Sans',
+        'font.size': 12,
+        'axes.titlesize': 14,
+        'axes.labelsize': 12,
+        'xtick.labelsize': 10,
+        'ytick.labelsize': 10,
+        'legend.fontsize': 10,
+        'figure.titlesize': 16,
+        'figure.autolayout': False,  # 各方法显式调用tight_layout
+        'savefig.pad_inches': 0.05,
+    },
+]
 
-# 确保使用英文字体
-plt.rcParams['font.family'] = 'DejaVu Sans'
-plt.rcParams['font.size'] = 12
-plt.rcParams['axes.titlesize'] = 14
-plt.rcParams['axes.labelsize'] = 12
-plt.rcParams['xtick.labelsize'] = 10
-plt.rcParams['ytick.labelsize'] = 10
-plt.rcParams['legend.fontsize'] = 10
-plt.rcParams['figure.titlesize'] = 16
+# PNG编码参数：跳过optimize的二次压缩，使用最快的zlib级别
+PNG_KWARGS = {'optimize': False, 'compress_level': 1}
+
+
+def _styled(method):
+    """在CHART_STYLE样式上下文中执行图表生成方法"""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with plt.style.context(CHART_STYLE):
+            sns.set_palette("husl")
+            return method(*args, **kwargs)
+    return wrapper
 
 class DDHPSIChartGenerator:
     """DDH-PSI协议图表生成器"""
     
-    def __init__(self, output_dir: str = "charts"):
+    def __init__(self, output_dir: str = "charts", dpi: int = 150):
         self.output_dir = output_dir
+        self.dpi = dpi  # 需要出版级质量时可传入300
         # 创建输出目录
         os.makedirs(self.output_dir, exist_ok=True)
+        
+        # 各图表共用的集合规模，预先构造为数组，后续按向量运算缩放
+        self.set_sizes_small = np.array([100, 500, 1000, 5000, 10000])
+        self.set_sizes_perf = np.array([100, 200, 500, 1000, 2000, 5000, 10000])
+        self.set_sizes_log = np.logspace(2, 5, 20)  # 100 to 100,000
     
+    @_styled
     def generate_protocol_overview_chart(self):
         """生成协议概览图表"""
         print("Generating protocol overview chart...")
@@ -38,12 +66,12 @@ class DDHPSIChartGenerator:
         
         # 左图：协议轮次和通信量
         rounds = ['Round 1\n(P1→P2)', 'Round 2\n(P2→P1)', 'Round 3\n(P1→P2)']
-        set_sizes = [100, 500, 1000, 5000, 10000]
+        set_sizes = self.set_sizes_small
         
         # 模拟通信量数据 (KB)
-        round1_data = [n * 0.065 for n in set_sizes]  # m1 * 65 bytes
-        round2_data = [n * 0.193 for n in set_sizes]  # m2 * 193 bytes  
-        round3_data = [0.128] * len(set_sizes)        # 固定 128 bytes
+        round1_data = set_sizes * 0.065                 # m1 * 65 bytes
+        round2_data = set_sizes * 0.193                 # m2 * 193 bytes  
+        round3_data = np.full(set_sizes.shape, 0.128)   # 固定 128 bytes
         
         x = np.arange(len(set_sizes))
         width = 0.25
@@ -81,9 +109,10 @@ class DDHPSIChartGenerator:
         
         plt.tight_layout()
         plt.savefig(os.path.join(self.output_dir, 'protocol_overview.png'), 
-                   dpi=300, bbox_inches='tight')
+                   dpi=self.dpi, bbox_inches='tight', pil_kwargs=PNG_KWARGS)
         plt.close()
     
+    @_styled
     def generate_performance_analysis_chart(self):
         """生成性能分析图表"""
         print("Generating performance analysis chart...")
@@ -91,8 +120,8 @@ class DDHPSIChartGenerator:
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
         
         # 图1：执行时间 vs 集合大小
-        set_sizes = [100, 200, 500, 1000, 2000, 5000, 10000]
-        execution_times = [0.15, 0.28, 0.65, 1.20, 2.30, 5.50, 11.20]  # 秒
+        set_sizes = self.set_sizes_perf
+        execution_times = np.array([0.15, 0.28, 0.65, 1.20, 2.30, 5.50, 11.20])  # 秒
         
         ax1.plot(set_sizes, execution_times, 'bo-', linewidth=2, markersize=8)
         ax1.set_xlabel('Set Size')
@@ -103,7 +132,7 @@ class DDHPSIChartGenerator:
         ax1.set_yscale('log')
         
         # 图2：内存使用量
-        memory_usage = [n * 0.002 + 5 for n in set_sizes]  # MB
+        memory_usage = set_sizes * 0.002 + 5  # MB
         
         ax2.bar(range(len(set_sizes)), memory_usage, alpha=0.7, color='green')
         ax2.set_xlabel('Set Size')
@@ -114,7 +143,7 @@ class DDHPSIChartGenerator:
         ax2.grid(True, alpha=0.3)
         
         # 图3：吞吐量分析
-        throughput = [n / t for n, t in zip(set_sizes, execution_times)]
+        throughput = set_sizes / execution_times
         
         ax3.plot(set_sizes, throughput, 'ro-', linewidth=2, markersize=8)
         ax3.set_xlabel('Set Size')
@@ -144,9 +173,10 @@ class DDHPSIChartGenerator:
         
         plt.tight_layout()
         plt.savefig(os.path.join(self.output_dir, 'performance_analysis.png'), 
-                   dpi=300, bbox_inches='tight')
+                   dpi=self.dpi, bbox_inches='tight', pil_kwargs=PNG_KWARGS)
         plt.close()
     
+    @_styled
     def generate_scalability_chart(self):
         """生成可扩展性分析图表"""
         print("Generating scalability analysis chart...")
@@ -154,7 +184,7 @@ class DDHPSIChartGenerator:
         fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(18, 6))
         
         # 图1：时间复杂度分析
-        set_sizes = np.logspace(2, 5, 20)  # 100 to 100,000
+        set_sizes = self.set_sizes_log
         linear_time = set_sizes * 0.001    # O(n)
         quadratic_time = (set_sizes ** 2) * 0.000001  # O(n²)
         
@@ -194,9 +224,10 @@ class DDHPSIChartGenerator:
         
         plt.tight_layout()
         plt.savefig(os.path.join(self.output_dir, 'scalability_analysis.png'), 
-                   dpi=300, bbox_inches='tight')
+                   dpi=self.dpi, bbox_inches='tight', pil_kwargs=PNG_KWARGS)
         plt.close()
     
+    @_styled
     def generate_security_comparison_chart(self):
         """生成安全性对比图表"""
         print("Generating security comparison chart...")
@@ -271,42 +302,30 @@ class DDHPSIChartGenerator:
         bit_strength = [128, 112, 256, 256]
         quantum_safe = [0, 0, 1, 1]  # 1表示量子安全，0表示不安全
         
-        fig2, ax4_twin = plt.subplots(figsize=(8, 6))
-        
-        color1 = 'tab:blue'
+        # 直接绘制到子图：左轴为安全强度，右侧孪生轴为抗量子性
+        x = np.arange(len(crypto_components))
+        ax4.bar(x, bit_strength, alpha=0.7, color='skyblue', label='Security Bits')
         ax4.set_xlabel('Cryptographic Components')
-        ax4.set_ylabel('Security Strength (bits)', color=color1)
-        bars1 = ax4.bar(crypto_components, bit_strength, alpha=0.7, color=color1)
-        ax4.tick_params(axis='y', labelcolor=color1)
+        ax4.set_ylabel('Security Strength (bits)', color='tab:blue')
+        ax4.tick_params(axis='y', labelcolor='tab:blue')
+        ax4.set_title('Cryptographic Component Strength')
+        ax4.set_xticks(x)
+        ax4.set_xticklabels(crypto_components, rotation=45, ha='right')
         ax4.grid(True, alpha=0.3)
         
         ax4_twin = ax4.twinx()
         color2 = 'tab:red'
         ax4_twin.set_ylabel('Quantum Resistance', color=color2)
-        bars2 = ax4_twin.bar(crypto_components, quantum_safe, alpha=0.5, color=color2, width=0.4)
+        ax4_twin.bar(x, quantum_safe, alpha=0.5, color=color2, width=0.4)
         ax4_twin.tick_params(axis='y', labelcolor=color2)
         ax4_twin.set_ylim(-0.1, 1.1)
         
-        ax4.set_title('DDH-PSI Cryptographic Strength Analysis')
-        plt.setp(ax4.xaxis.get_majorticklabels(), rotation=45, ha='right')
-        
-        plt.close(fig2)  # 关闭临时图
-        
-        # 重新绘制到子图
-        x = np.arange(len(crypto_components))
-        ax4.bar(x, bit_strength, alpha=0.7, color='skyblue', label='Security Bits')
-        ax4.set_xlabel('Cryptographic Components')
-        ax4.set_ylabel('Security Strength (bits)')
-        ax4.set_title('Cryptographic Component Strength')
-        ax4.set_xticks(x)
-        ax4.set_xticklabels(crypto_components, rotation=45, ha='right')
-        ax4.grid(True, alpha=0.3)
-        
         plt.tight_layout()
         plt.savefig(os.path.join(self.output_dir, 'security_comparison.png'), 
-                   dpi=300, bbox_inches='tight')
+                   dpi=self.dpi, bbox_inches='tight', pil_kwargs=PNG_KWARGS)
         plt.close()
     
+    @_styled
     def generate_application_scenarios_chart(self):
         """生成应用场景图表"""
         print("Generating application scenarios chart...")
@@ -386,9 +405,10 @@ class DDHPSIChartGenerator:
         
         plt.tight_layout()
         plt.savefig(os.path.join(self.output_dir, 'application_scenarios.png'), 
-                   dpi=300, bbox_inches='tight')
+                   dpi=self.dpi, bbox_inches='tight', pil_kwargs=PNG_KWARGS)
         plt.close()
     
+    @_styled
     def generate_algorithm_comparison_chart(self):
         """生成算法对比图表"""
         print("Generating algorithm comparison chart...")
@@ -487,7 +507,7 @@ class DDHPSIChartGenerator:
         
         plt.tight_layout()
         plt.savefig(os.path.join(self.output_dir, 'algorithm_comparison.png'), 
-                   dpi=300, bbox_inches='tight')
+                   dpi=self.dpi, bbox_inches='tight', pil_kwargs=PNG_KWARGS)
         plt.close()
     
     def generate_all_charts(self):
@@ -495,13 +515,20 @@ class DDHPSIChartGenerator:
         print("Starting DDH-PSI chart generation...")
         print(f"Output directory: {self.output_dir}")
         
+        charts = [
+            'generate_protocol_overview_chart',
+            'generate_performance_analysis_chart',
+            'generate_scalability_chart',
+            'generate_security_comparison_chart',
+            'generate_application_scenarios_chart',
+            'generate_algorithm_comparison_chart',
+        ]
+        
         try:
-            self.generate_protocol_overview_chart()
-            self.generate_performance_analysis_chart()
-            self.generate_scalability_chart()
-            self.generate_security_comparison_chart()
-            self.generate_application_scenarios_chart()
-            self.generate_algorithm_comparison_chart()
+            # 各图表相互独立且写入不同文件，用进程池并行渲染
+            processes = min(len(charts), os.cpu_count() or 1)
+            with multiprocessing.Pool(processes=processes) as pool:
+                pool.map(_generate_chart, [(self.output_dir, self.dpi, name) for name in charts])
             
             print(f"\n✅ All charts generated successfully!")
             print(f"Charts saved to: {os.path.abspath(self.output_dir)}")
@@ -517,6 +544,11 @@ class DDHPSIChartGenerator:
             import traceback
             traceback.print_exc()
 
+def _generate_chart(args):
+    """在工作进程中生成单个图表（模块级函数，便于进程池序列化）"""
+    output_dir, dpi, chart_name = args
+    getattr(DDHPSIChartGenerator(output_dir, dpi), chart_name)()
+
 if __name__ == "__main__":
     generator = DDHPSIChartGenerator()
     generator.generate_all_charts()
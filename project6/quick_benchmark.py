@@ -4,9 +4,10 @@
 """
 
 import time
-import random
 import sys
 
+import numpy as np
+
 def quick_benchmark():
     """快速性能测试"""
     print("🎯 DDH-PSI协议性能基准测试")
@@ -21,23 +22,29 @@ def quick_benchmark():
     ]
     
     results = []
+    rng = np.random.default_rng()
     
     for size1, size2 in test_cases:
         print(f"\n📊 测试规模: {size1:,} x {size2:,}")
         
-        # 生成测试数据
-        party1_data = [f"user_{i}" for i in range(size1)]
-        party2_data = [(f"user_{i}", random.randint(100, 1000)) for i in range(0, size2, 2)]
+        # 生成测试数据：整数用户ID，避免逐个格式化字符串
+        party1_data = np.arange(size1, dtype=np.int64).tolist()
+        party2_ids = np.arange(0, size2, 2, dtype=np.int64)
+        party2_values = rng.integers(100, 1001, size=party2_ids.size)
         
         # 开始计时
         start_time = time.time()
         
         # 模拟协议核心计算
+        # Party2以ID、金额两个平行数组表示，字典只保存ID到下标的映射
         party1_set = set(party1_data)
-        party2_dict = dict(party2_data)
-        intersection = party1_set.intersection(party2_dict.keys())
+        key_to_idx = {user_id: i for i, user_id in enumerate(party2_ids.tolist())}
+        intersection = party1_set.intersection(key_to_idx)
         intersection_size = len(intersection)
-        intersection_sum = sum(party2_dict[user_id] for user_id in intersection)
+        # 先收集交集下标，再用花式索引在C层完成求和
+        idx = np.fromiter(map(key_to_idx.__getitem__, intersection),
+                          dtype=np.int64, count=intersection_size)
+        intersection_sum = int(party2_values[idx].sum())
         
         # 结束计时
         end_time = time.time()
@@ -1,10 +1,17 @@
 from setuptools import setup, find_packages
 
+try:  # hash_to_curve与Paillier内层循环的Cython加速扩展为可选项，未安装Cython时跳过
+    from Cython.Build import cythonize
+    ext_modules = cythonize(["src/_hash_to_curve.pyx", "src/_fast.pyx"], language_level=3)
+except ImportError:
+    ext_modules = []
+
 setup(
     name="ddh-psi-protocol",
     version="1.0.0",
     description="DDH-based Private Set Intersection with Sum Protocol",
     packages=find_packages(),
+    ext_modules=ext_modules,
     python_requires=">=3.8",
     install_requires=[
         "cryptography>=3.4.8",
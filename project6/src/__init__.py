@@ -12,7 +12,7 @@ __version__ = "1.0.0"
 __author__ = "DDH-PSI Protocol Implementation"
 
 from .ddh_psi import DDHPSIParty1, DDHPSIParty2
-from .crypto_utils import hash_to_curve, secure_random
+from .crypto_utils import HashToCurveCache, hash_to_curve, hash_to_curve_batch, secure_random
 from .elliptic_curve import EllipticCurveGroup
 from .paillier_encryption import PaillierEncryption
 
@@ -22,5 +22,7 @@ __all__ = [
     "EllipticCurveGroup",
     "PaillierEncryption",
     "hash_to_curve",
+    "hash_to_curve_batch",
+    "HashToCurveCache",
     "secure_random",
 ]
@@ -0,0 +1,25 @@
+# cython: language_level=3
+"""
+Paillier密文运算内层循环的Cython实现（可选编译扩展）
+
+未编译时paillier_encryption自动回退到纯Python实现。
+"""
+
+
+cpdef object sum_ct(list cts, object n_squared):
+    """
+    计算密文列表的模n²累乘（对应明文求和）
+
+    Args:
+        cts: 非空密文列表
+        n_squared: 公钥n²
+
+    Returns:
+        所有密文之积 mod n²
+    """
+    cdef Py_ssize_t i
+    cdef Py_ssize_t count = len(cts)
+    cdef object result = cts[0]
+    for i in range(1, count):
+        result = result * cts[i] % n_squared
+    return result
@@ -0,0 +1,48 @@
+# cython: language_level=3
+"""
+哈希到曲线候选搜索的Cython实现（可选编译扩展）
+
+与crypto_utils.hash_to_curve中的纯Python循环逐步一致，
+产生完全相同的结果；未编译时crypto_utils自动回退到纯Python实现。
+"""
+
+import hashlib
+
+try:
+    import gmpy2
+    _mpz = gmpy2.mpz
+    _powmod = gmpy2.powmod
+    _legendre = gmpy2.legendre
+except ImportError:
+    _mpz = int
+    _powmod = pow
+    _legendre = None
+
+_sha256 = hashlib.sha256
+
+
+cpdef tuple find_curve_point(bytes seed, object p, object b, object sqrt_exp,
+                             int counter_max=256):
+    """
+    从种子摘要出发按try-and-increment搜索曲线点
+
+    Args:
+        seed: 标识符的SHA-256摘要
+        p, b, sqrt_exp: 曲线的域素数、参数b及平方根指数
+        counter_max: 计数器上界
+
+    Returns:
+        曲线点坐标 (x, y)；搜索失败时返回None
+    """
+    cdef int counter
+    cdef object x, rhs, y
+    for counter in range(counter_max):
+        digest = _sha256(seed + counter.to_bytes(4, 'big')).digest()
+        x = _mpz(int.from_bytes(digest, 'big')) % p
+        rhs = (_powmod(x, 3, p) - 3 * x + b) % p
+        if _legendre is not None and _legendre(rhs, p) == -1:
+            continue
+        y = _powmod(rhs, sqrt_exp, p)
+        if y * y % p == rhs:
+            return (int(x), int(y))
+    return None
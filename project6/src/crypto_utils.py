@@ -7,10 +7,43 @@
 - 群元素序列化/反序列化
 """
 
+import functools
 import hashlib
+import numbers
+import os
 import secrets
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import ec
+import shelve
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple, Union
+
+
+try:
+    import gmpy2
+    _mpz = gmpy2.mpz
+    _powmod = gmpy2.powmod
+    _legendre = gmpy2.legendre
+except ImportError:  # gmpy2为可选依赖，缺失时使用内置大整数
+    _mpz = int
+    _powmod = pow
+    _legendre = None  # 纯Python实现的Legendre符号比一次模幂更慢，不做预筛
+
+try:  # 可选的Cython编译扩展（python setup.py build_ext --inplace），缺失时使用纯Python循环
+    from ._hash_to_curve import find_curve_point as _find_curve_point
+except ImportError:
+    _find_curve_point = None
+
+# SECP256R1参数（哈希到曲线使用）
+_P256_P = _mpz(0xffffffff00000001000000000000000000000000ffffffffffffffffffffffff)
+_P256_B = _mpz(0x5ac635d8aa3a93e7b3ebbd55769886bc651d06b0cc53b0f63bce3c3e27d2604b)
+_P256_SQRT_EXP = (_P256_P + 1) // 4
+
+# 曲线名称 -> (p, b, 平方根指数)，均为模块加载时预计算的常量
+_CURVES = {
+    "prime256v1": (_P256_P, _P256_B, _P256_SQRT_EXP),
+}
+
+# 非压缩点格式前缀0x04，预先移位到65字节整数的最高字节
+_POINT_PREFIX = 0x04 << 512
 
 
 def secure_random(byte_length: int) -> bytes:
@@ -41,70 +74,173 @@ def secure_random_int(bit_length: int) -> int:
     return int.from_bytes(random_bytes, 'big') % (1 << bit_length)
 
 
-def hash_to_curve(data: str, curve_name: str = "prime256v1") -> ec.EllipticCurvePoint:
+def _identifier_seed(data: Union[str, bytes, int]) -> bytes:
+    """
+    计算标识符的SHA-256种子摘要（字符串按UTF-8编码，整数按8字节大端序编码）
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    elif isinstance(data, numbers.Integral):
+        data = int(data).to_bytes(8, 'big')
+    return hashlib.sha256(data).digest()
+
+
+@functools.lru_cache(maxsize=65536)
+def hash_to_curve(data: Union[str, bytes, int], curve_name: str = "prime256v1") -> Tuple[int, int]:
     """
-    将字符串数据哈希映射到椭圆曲线上的点
+    将字符串、字节串或64位整数标识符哈希映射到椭圆曲线上的点
     
     这个函数实现了安全的哈希到曲线映射，基于SHA-256哈希函数
-    和try-and-increment方法。
+    和try-and-increment方法。候选x坐标按需逐个生成，模幂运算在安装了
+    gmpy2时使用GMP实现。结果按(data, curve_name)缓存（上限65536项），
+    同一标识符在多轮或多次运行中重复哈希时直接返回。
     
     Args:
-        data: 要映射的字符串数据
+        data: 要映射的数据（字符串按UTF-8编码，字节串直接使用，
+              整数（含numpy.uint64）按8字节大端序编码）
         curve_name: 椭圆曲线名称（默认prime256v1）
         
     Returns:
-        椭圆曲线上的点
-    """
-    if curve_name == "prime256v1":
-        curve = ec.SECP256R1()
-    else:
-        raise ValueError(f"Unsupported curve: {curve_name}")
-    
-    # 使用SHA-256哈希数据
-    hasher = hashlib.sha256()
-    hasher.update(data.encode('utf-8'))
-    
-    # Try-and-increment方法寻找有效的曲线点
-    counter = 0
-    while counter < 256:  # 安全上界
-        # 将计数器添加到哈希中
-        attempt_hasher = hashlib.sha256()
-        attempt_hasher.update(hasher.digest())
-        attempt_hasher.update(counter.to_bytes(4, 'big'))
-        hash_result = attempt_hasher.digest()
+        椭圆曲线上的点坐标 (x, y)
+    """
+    try:
+        p, b, sqrt_exp = _CURVES[curve_name]
+    except KeyError:
+        raise ValueError(f"Unsupported curve: {curve_name}") from None
+    
+    # 使用SHA-256哈希数据，作为候选生成的种子
+    seed = _identifier_seed(data)
+    
+    if _find_curve_point is not None:
+        point = _find_curve_point(seed, p, b, sqrt_exp)
+        if point is None:
+            raise ValueError("无法将数据映射到椭圆曲线点")
+        return point
+    
+    # Try-and-increment方法寻找有效的曲线点；候选摘要按需逐个生成，
+    # 平均约2个候选即可成功，找到后不再多算哈希
+    sha256 = hashlib.sha256
+    for counter in range(256):  # 安全上界
+        digest = sha256(seed + counter.to_bytes(4, 'big')).digest()
         
-        try:
-            # 尝试从哈希结果构造x坐标
-            x = int.from_bytes(hash_result[:32], 'big')
-            
-            # 计算对应的y坐标（椭圆曲线方程：y² = x³ + ax + b）
-            # 对于SECP256R1：y² = x³ - 3x + b
-            p = curve.key_size // 8  # 字段大小
-            field_prime = 0xffffffff00000001000000000000000000000000ffffffffffffffffffffffff
-            
-            x = x % field_prime
-            
-            # 计算右侧：x³ - 3x + b
-            b = 0x5ac635d8aa3a93e7b3ebbd55769886bc651d06b0cc53b0f63bce3c3e27d2604b
-            rhs = (pow(x, 3, field_prime) - 3 * x + b) % field_prime
-            
-            # 检查是否为二次剩余
-            y_squared = rhs
-            y = pow(y_squared, (field_prime + 1) // 4, field_prime)
-            
-            if pow(y, 2, field_prime) == y_squared:
-                # 找到有效点，构造椭圆曲线点
-                # 由于cryptography库的限制，我们返回坐标元组
-                return (x, y)
-                
-        except Exception:
-            pass
-            
-        counter += 1
+        # 从哈希结果构造x坐标
+        x = _mpz(int.from_bytes(digest, 'big')) % p
+        
+        # 计算右侧：x³ - 3x + b（SECP256R1：y² = x³ - 3x + b）
+        rhs = (_powmod(x, 3, p) - 3 * x + b) % p
+        
+        # 有gmpy2时先用Legendre符号筛掉非二次剩余（约一半候选），
+        # 省去这些候选的开方模幂
+        if _legendre is not None and _legendre(rhs, p) == -1:
+            continue
+        
+        # p ≡ 3 (mod 4)，平方根为 rhs^((p+1)/4)；验证是否为二次剩余
+        y = _powmod(rhs, sqrt_exp, p)
+        if y * y % p == rhs:
+            return (int(x), int(y))
     
     raise ValueError("无法将数据映射到椭圆曲线点")
 
 
+def hash_to_curve_batch(items: Sequence[Union[str, bytes, int]],
+                        workers: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    批量将标识符哈希映射到椭圆曲线点，多进程并行计算
+    
+    各标识符的映射相互独立，且纯Python大整数运算受GIL限制，
+    因此用进程池分摊到多个CPU核心；单核或只有一个工作进程时直接串行计算。
+    
+    Args:
+        items: 标识符序列（类型同hash_to_curve的data参数）
+        workers: 工作进程数（默认CPU核心数）
+        
+    Returns:
+        与items一一对应的椭圆曲线点坐标列表
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(items) <= 1:
+        return [hash_to_curve(item) for item in items]
+    
+    # 每个工作进程约分到4块，摊薄进程间通信开销
+    chunksize = max(1, len(items) // workers // 4)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(hash_to_curve, items, chunksize=chunksize))
+
+
+class HashToCurveCache:
+    """
+    跨进程持久化的哈希到曲线缓存
+    
+    hash_to_curve的lru_cache只在进程内有效；对每天针对同一标识符全集重复运行的
+    PSI任务，可用该缓存把映射结果保存到磁盘（shelve），后续运行直接读取。
+    键为标识符的无盐SHA-256摘要，值为公开可计算的曲线点，二者都可被字典攻击
+    还原出标识符（对手机号、邮箱等低熵标识符尤其容易），因此缓存文件应按
+    标识符明文同等级别保护。
+    
+    用法：
+        with HashToCurveCache("h2c_cache") as cache:
+            points = cache.get_batch(identifiers)
+    """
+    
+    def __init__(self, path: str):
+        """
+        Args:
+            path: shelve数据库文件路径
+        """
+        self.path = path
+        self._db = None
+    
+    def open(self) -> "HashToCurveCache":
+        """打开缓存数据库（不存在时创建）"""
+        if self._db is None:
+            self._db = shelve.open(self.path)
+        return self
+    
+    def close(self):
+        """将缓存写回磁盘并关闭"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+    
+    def __enter__(self) -> "HashToCurveCache":
+        return self.open()
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def get(self, data: Union[str, bytes, int]) -> Tuple[int, int]:
+        """
+        获取标识符对应的曲线点，缓存未命中时计算并写入
+        
+        Args:
+            data: 标识符（类型同hash_to_curve的data参数）
+            
+        Returns:
+            椭圆曲线点坐标 (x, y)
+        """
+        if self._db is None:
+            raise RuntimeError("缓存未打开")
+        key = _identifier_seed(data).hex()
+        point = self._db.get(key)
+        if point is None:
+            point = hash_to_curve(data)
+            self._db[key] = point
+        return point
+    
+    def get_batch(self, items: Sequence[Union[str, bytes, int]]) -> List[Tuple[int, int]]:
+        """
+        批量获取标识符对应的曲线点
+        
+        Args:
+            items: 标识符序列
+            
+        Returns:
+            与items一一对应的椭圆曲线点坐标列表
+        """
+        get = self.get
+        return [get(item) for item in items]
+
+
 def point_to_bytes(point: tuple) -> bytes:
     """
     将椭圆曲线点转换为字节串
@@ -116,8 +252,11 @@ def point_to_bytes(point: tuple) -> bytes:
         点的字节表示
     """
     x, y = point
-    # 使用非压缩格式：0x04 || x || y
-    return b'\x04' + x.to_bytes(32, 'big') + y.to_bytes(32, 'big')
+    # 坐标须在 [0, 2^256) 内，否则按位或会悄悄截断；(x | y) >> 256 对负数也非零
+    if (x | y) >> 256:
+        raise OverflowError("椭圆曲线点坐标超出32字节范围")
+    # 使用非压缩格式：0x04 || x || y，合成一个整数后一次性编码
+    return (_POINT_PREFIX | (x << 256) | y).to_bytes(65, 'big')
 
 
 def bytes_to_point(data: bytes) -> tuple:
@@ -138,6 +277,45 @@ def bytes_to_point(data: bytes) -> tuple:
     return (x, y)
 
 
+def points_to_bytes(points: Sequence[tuple]) -> bytes:
+    """
+    批量将椭圆曲线点转换为连续的字节串（每点65字节非压缩格式）
+    
+    每个点的前缀与坐标先合成一个整数，只调用一次to_bytes，最后统一拼接，
+    避免逐点构造多个小字节串
+    
+    Args:
+        points: 椭圆曲线点坐标 (x, y) 的序列
+        
+    Returns:
+        所有点依次拼接的字节表示
+    """
+    if any((x | y) >> 256 for x, y in points):
+        raise OverflowError("椭圆曲线点坐标超出32字节范围")
+    prefix = _POINT_PREFIX
+    return b''.join([(prefix | (x << 256) | y).to_bytes(65, 'big') for x, y in points])
+
+
+def bytes_to_points(data: bytes) -> List[tuple]:
+    """
+    批量将连续字节串转换为椭圆曲线点（points_to_bytes的逆运算）
+    
+    Args:
+        data: 若干65字节非压缩格式点依次拼接的字节串
+        
+    Returns:
+        椭圆曲线点坐标 (x, y) 列表
+    """
+    if len(data) % 65 != 0 or data[::65].strip(b'\x04'):
+        raise ValueError("无效的椭圆曲线点格式")
+    
+    # 每个点的x||y作为一个512位整数读入，再用移位和掩码拆出坐标
+    from_bytes = int.from_bytes
+    values = [from_bytes(data[i:i + 64], 'big') for i in range(1, len(data), 65)]
+    mask = (1 << 256) - 1
+    return [(v >> 256, v & mask) for v in values]
+
+
 def sha256_hash(data: bytes) -> bytes:
     """
     计算SHA-256哈希值
@@ -148,6 +326,4 @@ def sha256_hash(data: bytes) -> bytes:
     Returns:
         SHA-256哈希值
     """
-    hasher = hashlib.sha256()
-    hasher.update(data)
-    return hasher.digest()
+    return hashlib.sha256(data).digest()
@@ -8,6 +8,7 @@ DDH-PSI协议核心实现
 - 安全性保证
 """
 
+import multiprocessing
 import random
 from typing import List, Tuple, Dict, Union, Optional
 from .elliptic_curve import EllipticCurveGroup
@@ -15,6 +16,49 @@ from .paillier_encryption import PaillierEncryption
 from .crypto_utils import hash_to_curve
 
 
+def _point_power_chunk(args) -> List[Optional[Tuple[int, int]]]:
+    """
+    在工作进程中处理一块数据：可选地先哈希到曲线，再统一求幂
+    
+    模块级函数，便于进程池序列化；椭圆曲线群实例在工作进程中重建
+    """
+    use_openssl, exponent, items, hash_items = args
+    ec_group = EllipticCurveGroup(use_openssl=use_openssl)
+    points = [hash_to_curve(item) for item in items] if hash_items else items
+    return ec_group.batch_point_power(points, exponent)
+
+
+def _parallel_point_power(ec_group: EllipticCurveGroup, items: list, exponent: int,
+                          workers: int = 1, hash_items: bool = False) -> List[Optional[Tuple[int, int]]]:
+    """
+    批量计算 H(item)^exponent（hash_items为True）或 item^exponent
+    
+    workers > 1 时将数据按连续块分给进程池，结果保持输入顺序；
+    否则在当前进程中直接计算
+    
+    Args:
+        ec_group: 椭圆曲线群实例
+        items: 标识符或椭圆曲线点列表
+        exponent: 指数
+        workers: 工作进程数
+        hash_items: 是否先将items哈希到曲线
+        
+    Returns:
+        结果点列表
+    """
+    if workers <= 1 or len(items) < 2:
+        points = [hash_to_curve(item) for item in items] if hash_items else items
+        return ec_group.batch_point_power(points, exponent)
+    
+    use_openssl = ec_group.backend is not None
+    chunk_size = -(-len(items) // workers)
+    chunks = [(use_openssl, exponent, items[i:i + chunk_size], hash_items)
+              for i in range(0, len(items), chunk_size)]
+    with multiprocessing.Pool(processes=workers) as pool:
+        results = pool.map(_point_power_chunk, chunks)
+    return [point for chunk in results for point in chunk]
+
+
 class DDHPSIParty1:
     """
     DDH-PSI协议的参与方1
@@ -26,12 +70,20 @@ class DDHPSIParty1:
     3. 识别交集并计算聚合结果
     """
     
-    def __init__(self):
-        """初始化Party1"""
-        self.ec_group = EllipticCurveGroup()
+    def __init__(self, ec_group: Optional[EllipticCurveGroup] = None, workers: int = 1):
+        """
+        初始化Party1
+        
+        Args:
+            ec_group: 可复用的椭圆曲线群实例（为None时新建）
+            workers: 曲线运算使用的进程数（1表示不使用多进程）
+        """
+        self.ec_group = ec_group or EllipticCurveGroup()
+        self.workers = workers
         self.private_key = None
         self.encrypted_own_data = []  # 自己数据的加密结果
         self.received_z_set = []      # 从Party2接收的Z集合
+        self.received_z_lookup = frozenset()  # Z集合的哈希索引，用于O(1)成员判断
         self.received_w_data = []     # 从Party2接收的W数据
         
     def round1_prepare_data(self, data_set: List[str]) -> List[Tuple[int, int]]:
@@ -49,20 +101,15 @@ class DDHPSIParty1:
         # 生成私钥k1
         self.private_key = self.ec_group.generate_private_key()
         
-        # 对每个数据点进行加密：H(v_i)^k1
-        encrypted_points = []
-        for item in data_set:
-            # 将字符串哈希到椭圆曲线点
-            point = hash_to_curve(item)
-            # 计算H(v_i)^k1
-            encrypted_point = self.ec_group.point_power(point, self.private_key)
-            encrypted_points.append(encrypted_point)
+        # 对每个数据点进行加密：H(v_i)^k1，整批计算
+        encrypted_points = _parallel_point_power(self.ec_group, list(data_set), self.private_key,
+                                                 self.workers, hash_items=True)
         
         # 打乱顺序以保护隐私
         random.shuffle(encrypted_points)
         
-        # 保存用于后续使用
-        self.encrypted_own_data = encrypted_points.copy()
+        # 保存用于后续使用（之后不再修改，与返回值共享同一列表）
+        self.encrypted_own_data = encrypted_points
         
         return encrypted_points
     
@@ -76,14 +123,18 @@ class DDHPSIParty1:
             w_data: Party2发送的W数据，包含(H(w_j)^k2, Enc(t_j))
         """
         self.received_z_set = z_set
+        self.received_z_lookup = frozenset(z_set)
         self.received_w_data = w_data
     
-    def round3_compute_intersection(self, paillier_public_key: dict) -> Tuple[int, int]:
+    def round3_compute_intersection(self, paillier_public_key: dict,
+                                    aggregate_mode: str = "per_record") -> Tuple[int, int]:
         """
         第三轮：计算交集并生成聚合结果
         
         Args:
             paillier_public_key: Paillier公钥
+            aggregate_mode: "per_record"逐个同态相加后再重随机化；
+                "batched"在一次遍历中完成求和与重随机化
             
         Returns:
             (交集大小, 重随机化后的聚合密文)
@@ -91,27 +142,27 @@ class DDHPSIParty1:
         paillier = PaillierEncryption()
         
         # 对接收到的W数据进行第二次加密：H(w_j)^(k1*k2)
-        double_encrypted_w = []
-        encrypted_values = []
-        
-        for w_point, encrypted_value in self.received_w_data:
-            # 计算H(w_j)^(k1*k2)
-            double_encrypted = self.ec_group.point_power(w_point, self.private_key)
-            double_encrypted_w.append(double_encrypted)
-            encrypted_values.append(encrypted_value)
+        w_points = [w_point for w_point, _ in self.received_w_data]
+        double_encrypted_w = _parallel_point_power(self.ec_group, w_points, self.private_key,
+                                                   self.workers)
         
-        # 识别交集：找到在Z集合中的点
-        intersection_indices = []
-        for i, double_encrypted in enumerate(double_encrypted_w):
-            if double_encrypted in self.received_z_set:
-                intersection_indices.append(i)
+        # 识别交集：一次遍历直接收集Z集合中的点对应的密文
+        z_lookup = self.received_z_lookup
+        intersection_ciphertexts = [encrypted_value
+                                    for double_encrypted, (_, encrypted_value)
+                                    in zip(double_encrypted_w, self.received_w_data)
+                                    if double_encrypted in z_lookup]
         
         # 计算交集大小
-        intersection_size = len(intersection_indices)
+        intersection_size = len(intersection_ciphertexts)
+        
+        if aggregate_mode == "batched":
+            # 求和与重随机化融合为一次遍历，只需一次模幂
+            refreshed_ciphertext = paillier.sum_and_refresh(intersection_ciphertexts, paillier_public_key)
+            return intersection_size, refreshed_ciphertext
         
         # 同态计算交集中关联值的总和
-        if intersection_indices:
-            intersection_ciphertexts = [encrypted_values[i] for i in intersection_indices]
+        if intersection_ciphertexts:
             aggregated_ciphertext = paillier.sum_ciphertexts(intersection_ciphertexts, paillier_public_key)
         else:
             # 如果没有交集，加密0
@@ -134,10 +185,20 @@ class DDHPSIParty2:
     3. 解密最终结果
     """
     
-    def __init__(self):
-        """初始化Party2"""
-        self.ec_group = EllipticCurveGroup()
-        self.paillier = PaillierEncryption()
+    def __init__(self, ec_group: Optional[EllipticCurveGroup] = None,
+                 paillier: Optional[PaillierEncryption] = None,
+                 workers: int = 1):
+        """
+        初始化Party2
+        
+        Args:
+            ec_group: 可复用的椭圆曲线群实例（为None时新建）
+            paillier: 可复用的Paillier实例；若已生成密钥对，setup时直接沿用
+            workers: 曲线运算与批量加密使用的进程数（1表示不使用多进程）
+        """
+        self.ec_group = ec_group or EllipticCurveGroup()
+        self.workers = workers
+        self.paillier = paillier or PaillierEncryption()
         self.private_key = None
         self.paillier_public_key = None
         self.paillier_private_key = None
@@ -149,16 +210,20 @@ class DDHPSIParty2:
         Returns:
             Paillier公钥
         """
-        # 生成椭圆曲线私钥k2
+        # 生成椭圆曲线私钥k2（每次运行都重新生成）
         self.private_key = self.ec_group.generate_private_key()
         
-        # 生成Paillier密钥对
-        self.paillier_public_key, self.paillier_private_key = self.paillier.generate_keypair()
+        # 生成Paillier密钥对；已有密钥对时直接复用，省去耗时的素数生成
+        if self.paillier.public_key is None or self.paillier.private_key is None:
+            self.paillier.generate_keypair()
+        self.paillier_public_key = self.paillier.public_key
+        self.paillier_private_key = self.paillier.private_key
         
         return self.paillier_public_key
     
     def round2_process_and_respond(self, received_x_data: List[Tuple[int, int]], 
-                                  own_data: List[Tuple[str, int]]) -> Tuple[List[Tuple[int, int]], 
+                                  own_data: List[Tuple[str, int]],
+                                  aggregate_mode: str = "per_record") -> Tuple[List[Tuple[int, int]], 
                                                                           List[Tuple[Tuple[int, int], int]]]:
         """
         第二轮：处理接收到的数据并发送自己的数据
@@ -166,31 +231,30 @@ class DDHPSIParty2:
         Args:
             received_x_data: 从Party1接收的X数据，包含H(v_i)^k1
             own_data: 自己的数据集合W = {(w_j, t_j)}
+            aggregate_mode: "batched"时所有关联值通过一次batch_encrypt调用加密
             
         Returns:
             (Z集合, W数据) - 发送给Party1的数据
         """
         # 处理接收到的X数据：计算Z = {H(v_i)^(k1*k2)}
-        z_set = []
-        for x_point in received_x_data:
-            # 计算H(v_i)^(k1*k2)
-            z_point = self.ec_group.point_power(x_point, self.private_key)
-            z_set.append(z_point)
+        z_set = _parallel_point_power(self.ec_group, received_x_data, self.private_key,
+                                      self.workers)
         
         # 打乱Z集合的顺序
         random.shuffle(z_set)
         
-        # 处理自己的数据：计算{(H(w_j)^k2, Enc(t_j))}
-        w_data = []
-        for identifier, value in own_data:
-            # 将标识符哈希到椭圆曲线点
-            w_point = hash_to_curve(identifier)
-            # 计算H(w_j)^k2
-            encrypted_w = self.ec_group.point_power(w_point, self.private_key)
-            # 加密关联值t_j
-            encrypted_value = self.paillier.encrypt(value, self.paillier_public_key)
-            
-            w_data.append((encrypted_w, encrypted_value))
+        # 处理自己的数据：计算{(H(w_j)^k2, Enc(t_j))}，曲线运算整批完成
+        encrypted_ws = _parallel_point_power(self.ec_group, [identifier for identifier, _ in own_data],
+                                             self.private_key, self.workers, hash_items=True)
+        if aggregate_mode == "batched":
+            # 一次性批量加密关联值
+            encrypted_values = self.paillier.batch_encrypt(
+                [value for _, value in own_data], self.paillier_public_key, self.workers)
+        else:
+            # 逐个加密关联值t_j
+            encrypted_values = [self.paillier.encrypt(value, self.paillier_public_key)
+                                for _, value in own_data]
+        w_data = list(zip(encrypted_ws, encrypted_values))
         
         # 打乱W数据的顺序
         random.shuffle(w_data)
@@ -221,26 +285,47 @@ class DDHPSIProtocol:
     @staticmethod
     def run_protocol(party1_data: List[str], 
                     party2_data: List[Tuple[str, int]], 
-                    verbose: bool = False) -> Tuple[int, int]:
+                    verbose: bool = False,
+                    ec_group: Optional[EllipticCurveGroup] = None,
+                    paillier: Optional[PaillierEncryption] = None,
+                    mode: str = "ddh",
+                    aggregate_mode: str = "per_record",
+                    workers: int = 1) -> Tuple[int, int]:
         """
         执行完整的DDH-PSI协议
         
+        mode="plain"时跳过所有密码学运算，直接用集合求交，仅适用于数据
+        均在本地生成、无需隐私保护的分析场景
+        
         Args:
             party1_data: Party1的数据集合V
             party2_data: Party2的数据集合W
             verbose: 是否输出详细信息
+            ec_group: 双方共用的椭圆曲线群实例（为None时各自新建）
+            paillier: Party2使用的Paillier实例，已生成密钥对时跨运行复用
+            mode: "ddh"执行完整协议，"plain"执行明文集合求交
+            aggregate_mode: "per_record"逐条加密、逐个相加；"batched"批量加密，
+                并将交集密文求和与重随机化融合为一次遍历（安全性不变）
+            workers: 双方曲线运算与批量加密使用的进程数（1表示不使用多进程）
             
         Returns:
             (交集大小, 交集中关联值的总和)
         """
+        if mode == "plain":
+            return DDHPSIProtocol._run_plain(party1_data, party2_data)
+        if mode != "ddh":
+            raise ValueError(f"不支持的模式: {mode}")
+        if aggregate_mode not in ("per_record", "batched"):
+            raise ValueError(f"不支持的聚合模式: {aggregate_mode}")
+        
         if verbose:
             print("=== DDH-PSI协议执行开始 ===")
             print(f"Party1数据大小: {len(party1_data)}")
             print(f"Party2数据大小: {len(party2_data)}")
         
         # 初始化参与方
-        party1 = DDHPSIParty1()
-        party2 = DDHPSIParty2()
+        party1 = DDHPSIParty1(ec_group, workers)
+        party2 = DDHPSIParty2(ec_group, paillier, workers)
         
         # 设置阶段
         if verbose:
@@ -255,7 +340,7 @@ class DDHPSIProtocol:
         # 第二轮：Party2处理数据并响应
         if verbose:
             print("3. 第二轮：Party2处理并响应...")
-        z_set, w_data = party2.round2_process_and_respond(x_data, party2_data)
+        z_set, w_data = party2.round2_process_and_respond(x_data, party2_data, aggregate_mode)
         
         # Party1接收Party2的数据
         party1.round2_receive_data(z_set, w_data)
@@ -263,7 +348,8 @@ class DDHPSIProtocol:
         # 第三轮：Party1计算交集并聚合
         if verbose:
             print("4. 第三轮：计算交集和聚合...")
-        intersection_size, aggregated_ciphertext = party1.round3_compute_intersection(paillier_public_key)
+        intersection_size, aggregated_ciphertext = party1.round3_compute_intersection(
+            paillier_public_key, aggregate_mode)
         
         # Party2解密结果
         intersection_sum = party2.round3_decrypt_result(aggregated_ciphertext)
@@ -275,6 +361,28 @@ class DDHPSIProtocol:
         
         return intersection_size, intersection_sum
     
+    @staticmethod
+    def _run_plain(party1_data: List[str],
+                   party2_data: List[Tuple[str, int]]) -> Tuple[int, int]:
+        """
+        明文集合求交，与协议相同按Party2的每条记录计数和求和
+        
+        Args:
+            party1_data: Party1的数据
+            party2_data: Party2的数据
+            
+        Returns:
+            (交集大小, 交集总和)
+        """
+        party1_set = set(party1_data)
+        intersection_size = 0
+        intersection_sum = 0
+        for identifier, value in party2_data:
+            if identifier in party1_set:
+                intersection_size += 1
+                intersection_sum += value
+        return intersection_size, intersection_sum
+    
     @staticmethod
     def validate_intersection(party1_data: List[str], 
                             party2_data: List[Tuple[str, int]]) -> Tuple[int, int]:
@@ -3,51 +3,66 @@
 差分隐私机制实现
 """
 
-import random
 import math
+import secrets
 from typing import List, Union
 
+import numpy as np
+
 class DifferentialPrivacy:
     """差分隐私机制实现"""
     
     def __init__(self, epsilon: float = 1.0):
         self.epsilon = epsilon
     
+    @staticmethod
+    def _uniform(size=None) -> Union[float, np.ndarray]:
+        """
+        由操作系统CSPRNG（secrets）生成开区间(0, 1)上的均匀随机数
+        
+        每个随机数取8字节随机数据的高53位，(k + 0.5) / 2^53 保证不取到0和1；
+        整批一次读取随机字节，再由NumPy向量化转换
+        """
+        count = 1 if size is None else int(np.prod(size))
+        raw = np.frombuffer(secrets.token_bytes(8 * count), dtype=np.uint64)
+        u = ((raw >> np.uint64(11)).astype(np.float64) + 0.5) * 2.0 ** -53
+        return float(u[0]) if size is None else u.reshape(size)
+    
+    def _laplace_noise(self, scale: float, size=None) -> Union[float, np.ndarray]:
+        """用逆CDF将CSPRNG均匀随机数变换为Laplace(0, scale)噪声"""
+        u = self._uniform(size) - 0.5
+        return -scale * np.sign(u) * np.log1p(-2.0 * np.abs(u))
+    
     def laplace_mechanism(self, true_value: float, sensitivity: float = 1.0) -> float:
         """Laplace机制"""
         scale = sensitivity / self.epsilon
-        noise = random.laplace(0, scale)
+        noise = float(self._laplace_noise(scale))
         return true_value + noise
     
+    def laplace_mechanism_batch(self, true_values: np.ndarray, sensitivity: float = 1.0) -> np.ndarray:
+        """Laplace机制（向量化）：对数组中的每个值独立加噪"""
+        true_values = np.asarray(true_values, dtype=np.float64)
+        scale = sensitivity / self.epsilon
+        return true_values + self._laplace_noise(scale, true_values.shape)
+    
     def exponential_mechanism(self, options: List, utility_function, sensitivity: float = 1.0):
         """指数机制"""
-        scores = [utility_function(option) for option in options]
-        max_score = max(scores)
-        
-        # 计算概率权重
-        weights = []
-        for score in scores:
-            weight = math.exp(self.epsilon * score / (2 * sensitivity))
-            weights.append(weight)
-        
-        # 随机选择
-        total_weight = sum(weights)
-        r = random.random() * total_weight
+        scores = np.asarray([utility_function(option) for option in options], dtype=np.float64)
         
-        cumulative = 0
-        for i, weight in enumerate(weights):
-            cumulative += weight
-            if r <= cumulative:
-                return options[i]
+        # 计算概率权重；减去最大分数不改变概率分布，且避免exp溢出
+        weights = np.exp(self.epsilon * (scores - scores.max()) / (2 * sensitivity))
         
-        return options[-1]
+        # 按累积权重随机选择
+        cumulative = np.cumsum(weights)
+        index = int(np.searchsorted(cumulative, self._uniform() * cumulative[-1]))
+        return options[min(index, len(options) - 1)]
     
     def randomized_response(self, true_answer: bool, p: float = None) -> bool:
         """随机化响应机制"""
         if p is None:
             p = math.exp(self.epsilon) / (math.exp(self.epsilon) + 1)
         
-        if random.random() < p:
+        if self._uniform() < p:
             return true_answer
         else:
             return not true_answer
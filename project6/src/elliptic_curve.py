@@ -8,8 +8,15 @@
 """
 
 import secrets
-from typing import Tuple, Optional
-from .crypto_utils import secure_random_int
+from typing import List, Tuple, Optional
+from .crypto_utils import secure_random, point_to_bytes, bytes_to_point
+
+try:  # OpenSSL后端（cryptography库）为可选依赖，缺失时使用纯Python实现
+    from cryptography.hazmat.primitives.asymmetric import ec as _ec
+    _SECP256R1 = _ec.SECP256R1()
+    _ECDH = _ec.ECDH()
+except ImportError:
+    _ec = None
 
 
 class EllipticCurveGroup:
@@ -23,7 +30,22 @@ class EllipticCurveGroup:
     - n = 群的阶（基点的阶）
     """
     
-    def __init__(self):
+    # 基点固定窗口预计算参数：4位窗口，覆盖256位标量共64个窗口
+    BASE_WINDOW_BITS = 4
+    BASE_WINDOWS = 64
+    _base_table = None
+    
+    # 纯Python标量乘法的wNAF宽度（预计算P, 3P, ..., 15P）
+    WNAF_WIDTH = 5
+    
+    def __init__(self, use_openssl: bool = True):
+        """
+        Args:
+            use_openssl: 是否在cryptography可用时使用OpenSSL后端进行标量乘法
+        """
+        # 只保存开关而非模块对象，使实例可以被pickle（多进程间传递）
+        self.use_openssl = use_openssl and _ec is not None
+        
         # SECP256R1 (prime256v1) 参数
         self.p = 0xffffffff00000001000000000000000000000000ffffffffffffffffffffffff
         self.a = -3
@@ -38,6 +60,11 @@ class EllipticCurveGroup:
         # 无穷远点（群的单位元）
         self.O = None
     
+    @property
+    def backend(self):
+        """标量乘法后端：cryptography的ec模块，或None表示纯Python实现"""
+        return _ec if self.use_openssl else None
+    
     def is_on_curve(self, point: Optional[Tuple[int, int]]) -> bool:
         """
         检查点是否在椭圆曲线上
@@ -85,14 +112,13 @@ class EllipticCurveGroup:
                 return None  # P + (-P) = O
         
         # 一般情况的点加法
-        # 斜率 λ = (y2 - y1) / (x2 - x1)
-        dx = (x2 - x1) % self.p
-        dy = (y2 - y1) % self.p
-        lambda_val = (dy * self.mod_inverse(dx, self.p)) % self.p
+        # 斜率 λ = (y2 - y1) / (x2 - x1)，dx非零时模逆必然存在，直接调用C层的pow
+        p = self.p
+        lambda_val = (y2 - y1) * pow(x2 - x1, -1, p) % p
         
         # 新点的坐标
-        x3 = (lambda_val * lambda_val - x1 - x2) % self.p
-        y3 = (lambda_val * (x1 - x3) - y1) % self.p
+        x3 = (lambda_val * lambda_val - x1 - x2) % p
+        y3 = (lambda_val * (x1 - x3) - y1) % p
         
         return (x3, y3)
     
@@ -112,17 +138,17 @@ class EllipticCurveGroup:
         x, y = P
         
         # 斜率 λ = (3x² + a) / (2y)
-        numerator = (3 * x * x + self.a) % self.p
-        denominator = (2 * y) % self.p
+        p = self.p
+        denominator = (2 * y) % p
         
         if denominator == 0:
             return None  # 切线垂直，结果是无穷远点
         
-        lambda_val = (numerator * self.mod_inverse(denominator, self.p)) % self.p
+        lambda_val = (3 * x * x + self.a) * pow(denominator, -1, p) % p
         
         # 新点的坐标
-        x3 = (lambda_val * lambda_val - 2 * x) % self.p
-        y3 = (lambda_val * (x - x3) - y) % self.p
+        x3 = (lambda_val * lambda_val - 2 * x) % p
+        y3 = (lambda_val * (x - x3) - y) % p
         
         return (x3, y3)
     
@@ -147,19 +173,299 @@ class EllipticCurveGroup:
         
         # 确保k为正数
         k = k % self.n
+        if k == 0:
+            return None
         
-        # 二进制展开方法
-        result = None
-        addend = P
+        if self.backend is not None:
+            return self._scalar_mult_openssl(k, P)
+        
+        # 在Jacobian坐标下计算，最后做一次模逆转换回仿射坐标
+        return self._to_affine(*self._scalar_mult_jacobian(k, P))
+    
+    def _scalar_mult_jacobian(self, k: int, P: Tuple[int, int]) -> Tuple[int, int, int]:
+        """
+        纯Python标量乘法，结果以Jacobian坐标返回（k ∈ [1, n-1]）
+        
+        使用宽度为WNAF_WIDTH的wNAF表示：预计算P的奇数倍 P, 3P, ..., 15P，
+        k的非零位平均每WNAF_WIDTH+1位出现一次，点加次数约为二进制展开的1/3；
+        Jacobian点取负只需 Y -> -Y，倍点与加点只需模乘，不做模逆
+        """
+        p = self.p
+        jacobian_double = self._jacobian_double
+        jacobian_add = self._jacobian_add
         
-        while k > 0:
-            if k & 1:  # k的最低位为1
-                result = self.point_add(result, addend)
-            addend = self.point_double(addend)
+        # 奇数倍预计算表：table[i] = (2i+1) * P
+        x, y = P
+        table = [(x, y, 1)]
+        P2 = jacobian_double(x, y, 1)
+        for _ in range((1 << (self.WNAF_WIDTH - 2)) - 1):
+            table.append(jacobian_add(*table[-1], *P2))
+        
+        X, Y, Z = 1, 1, 0
+        for digit in reversed(self._wnaf(k)):
+            X, Y, Z = jacobian_double(X, Y, Z)
+            if digit > 0:
+                X, Y, Z = jacobian_add(X, Y, Z, *table[digit >> 1])
+            elif digit < 0:
+                tx, ty, tz = table[(-digit) >> 1]
+                X, Y, Z = jacobian_add(X, Y, Z, tx, p - ty, tz)
+        return (X, Y, Z)
+    
+    def _wnaf(self, k: int) -> List[int]:
+        """
+        计算k的宽度为WNAF_WIDTH的非相邻形式（低位在前）
+        
+        每个非零位为 ±1, ±3, ..., ±(2^(w-1) - 1) 中的奇数，且任意w个相邻位中至多一个非零
+        """
+        width = 1 << self.WNAF_WIDTH
+        half = width >> 1
+        mask = width - 1
+        digits = []
+        while k:
+            if k & 1:
+                digit = k & mask
+                if digit >= half:
+                    digit -= width
+                k -= digit
+            else:
+                digit = 0
+            digits.append(digit)
             k >>= 1
+        return digits
+    
+    def _jacobian_double(self, X: int, Y: int, Z: int) -> Tuple[int, int, int]:
+        """
+        Jacobian坐标下的点倍乘，(x, y) = (X/Z², Y/Z³)，Z = 0 表示无穷远点
+        
+        S = 4XY²，M = 3X² + aZ⁴，X' = M² - 2S，Y' = M(S - X') - 8Y⁴，Z' = 2YZ
+        """
+        p = self.p
+        if Z == 0 or Y == 0:
+            return (1, 1, 0)
+        
+        YY = Y * Y % p
+        S = 4 * X * YY % p
+        ZZ = Z * Z % p
+        M = (3 * X * X + self.a * ZZ * ZZ) % p
+        X3 = (M * M - 2 * S) % p
+        Y3 = (M * (S - X3) - 8 * YY * YY) % p
+        Z3 = 2 * Y * Z % p
+        return (X3, Y3, Z3)
+    
+    def _jacobian_add(self, X1: int, Y1: int, Z1: int,
+                      X2: int, Y2: int, Z2: int) -> Tuple[int, int, int]:
+        """
+        Jacobian坐标下的点加法
+        """
+        p = self.p
+        if Z1 == 0:
+            return (X2, Y2, Z2)
+        if Z2 == 0:
+            return (X1, Y1, Z1)
+        
+        Z1Z1 = Z1 * Z1 % p
+        Z2Z2 = Z2 * Z2 % p
+        U1 = X1 * Z2Z2 % p
+        U2 = X2 * Z1Z1 % p
+        S1 = Y1 * Z2 * Z2Z2 % p
+        S2 = Y2 * Z1 * Z1Z1 % p
+        
+        if U1 == U2:
+            if S1 != S2:
+                return (1, 1, 0)  # P + (-P) = O
+            return self._jacobian_double(X1, Y1, Z1)
+        
+        H = (U2 - U1) % p
+        R = (S2 - S1) % p
+        HH = H * H % p
+        HHH = H * HH % p
+        V = U1 * HH % p
+        X3 = (R * R - HHH - 2 * V) % p
+        Y3 = (R * (V - X3) - S1 * HHH) % p
+        Z3 = Z1 * Z2 * H % p
+        return (X3, Y3, Z3)
+    
+    def _to_affine(self, X: int, Y: int, Z: int) -> Optional[Tuple[int, int]]:
+        """
+        Jacobian坐标转换为仿射坐标（一次模逆）
+        """
+        if Z == 0:
+            return None
+        p = self.p
+        z_inv = pow(Z, p - 2, p)
+        z_inv2 = z_inv * z_inv % p
+        return (X * z_inv2 % p, Y * z_inv2 * z_inv % p)
+    
+    def batch_affine(self, points_jac: List[Tuple[int, int, int]]) -> List[Optional[Tuple[int, int]]]:
+        """
+        批量将Jacobian坐标转换为仿射坐标
+        
+        使用Montgomery同时求逆技巧：先计算所有Z的前缀积，只对总积求一次模逆，
+        再倒序逐个恢复各Z的逆元，N次模逆变为1次模逆加约3N次模乘
         
+        Args:
+            points_jac: Jacobian坐标点列表，Z = 0 表示无穷远点
+            
+        Returns:
+            仿射坐标点列表（无穷远点为None）
+        """
+        p = self.p
+        
+        # 前缀积：prefix[i] = Z_0 * ... * Z_(i-1)，跳过无穷远点
+        prefix = []
+        acc = 1
+        for _, _, Z in points_jac:
+            prefix.append(acc)
+            if Z:
+                acc = acc * Z % p
+        
+        inv = pow(acc, p - 2, p)
+        result = [None] * len(points_jac)
+        for i in range(len(points_jac) - 1, -1, -1):
+            X, Y, Z = points_jac[i]
+            if not Z:
+                continue
+            z_inv = inv * prefix[i] % p
+            inv = inv * Z % p
+            z_inv2 = z_inv * z_inv % p
+            result[i] = (X * z_inv2 % p, Y * z_inv2 * z_inv % p)
         return result
     
+    def batch_point_power(self, points: List[Optional[Tuple[int, int]]],
+                          exponent: int) -> List[Optional[Tuple[int, int]]]:
+        """
+        用同一指数批量计算 [P_i^exponent]
+        
+        OpenSSL后端逐点计算；纯Python实现在Jacobian坐标下完成全部标量乘法，
+        再通过batch_affine统一转换，整批只需一次模逆
+        
+        Args:
+            points: 椭圆曲线点列表
+            exponent: 指数
+            
+        Returns:
+            结果点列表
+        """
+        k = exponent % self.n
+        if self.backend is not None or k <= 1:
+            return [self.scalar_mult(exponent, P) for P in points]
+        
+        infinity = (1, 1, 0)
+        scalar_mult_jacobian = self._scalar_mult_jacobian
+        return self.batch_affine([infinity if P is None else scalar_mult_jacobian(k, P)
+                                  for P in points])
+    
+    def _scalar_mult_openssl(self, k: int, P: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """
+        使用OpenSSL计算 k*P（k ∈ [1, n-1]）
+        
+        ECDH只返回结果点的x坐标：另算 (k+1)*P 的x坐标x2，由点加法公式
+        x2 = λ² - x1 - xP，λ = (y1 - yP)/(x1 - xP) 及 y1² = x1³ - 3x1 + b
+        消去平方项，直接解出 y1 = (y1² + yP² - (x2 + x1 + xP)(x1 - xP)²) / (2yP)，
+        只需一次模逆，无需开方
+        
+        Args:
+            k: 标量，范围在 [1, n-1]
+            P: 曲线上的点（不在曲线上时抛出ValueError）
+            
+        Returns:
+            k*P
+        """
+        ec = self.backend
+        p = self.p
+        x, y = P
+        if P == self.G:
+            return self.scalar_mult_base(k)
+        if k == self.n - 1:
+            return (x, (-y) % p)  # (n-1)*P = -P
+        
+        peer = ec.EllipticCurvePublicNumbers(x, y, _SECP256R1).public_key()
+        x1 = int.from_bytes(ec.derive_private_key(k, _SECP256R1).exchange(_ECDH, peer), 'big')
+        x2 = int.from_bytes(ec.derive_private_key(k + 1, _SECP256R1).exchange(_ECDH, peer), 'big')
+        
+        y1_squared = x1 * x1 * x1 + self.a * x1 + self.b
+        dx = x1 - x
+        y1 = (y1_squared + y * y - (x2 + x1 + x) * dx * dx) * pow(2 * y, -1, p) % p
+        return (x1, y1)
+    
+    def _get_base_table(self) -> List[List[Tuple[int, int]]]:
+        """
+        获取基点G的固定窗口预计算表（首次使用时构建，所有实例共享）
+        
+        table[i][j] = (j+1) * 2^(4i) * G，i ∈ [0, 64)，j ∈ [0, 15)
+        
+        Returns:
+            预计算表
+        """
+        table = EllipticCurveGroup._base_table
+        if table is None:
+            table = []
+            base = self.G
+            for _ in range(self.BASE_WINDOWS):
+                row = [base]
+                for _ in range((1 << self.BASE_WINDOW_BITS) - 2):
+                    row.append(self.point_add(row[-1], base))
+                table.append(row)
+                # 下一窗口的基点：2^w * base = 15*base + base
+                base = self.point_add(row[-1], base)
+            EllipticCurveGroup._base_table = table
+        return table
+    
+    def scalar_mult_base(self, k: int) -> Optional[Tuple[int, int]]:
+        """
+        基点标量乘法：计算 k*G
+        
+        将k按4位窗口拆分，每个窗口直接查预计算表后相加，
+        只需至多64次点加法，无需点倍乘
+        
+        Args:
+            k: 标量
+            
+        Returns:
+            k*G
+        """
+        k = k % self.n
+        if k == 0:
+            return None
+        
+        if self.backend is not None:
+            numbers = self.backend.derive_private_key(k, _SECP256R1).public_key().public_numbers()
+            return (numbers.x, numbers.y)
+        
+        table = self._get_base_table()
+        mask = (1 << self.BASE_WINDOW_BITS) - 1
+        point_add = self.point_add
+        result = None
+        i = 0
+        while k:
+            digit = k & mask
+            if digit:
+                result = point_add(result, table[i][digit - 1])
+            k >>= self.BASE_WINDOW_BITS
+            i += 1
+        
+        return result
+    
+    def scalar_mult_batch(self, scalars: List[int],
+                          points: List[Optional[Tuple[int, int]]]) -> List[Optional[Tuple[int, int]]]:
+        """
+        批量标量乘法：计算 [k_i * P_i]
+        
+        以一次调用处理整批数据，供基准测试和协议批处理使用
+        
+        Args:
+            scalars: 标量列表
+            points: 与标量一一对应的椭圆曲线点列表
+            
+        Returns:
+            结果点列表
+        """
+        if len(scalars) != len(points):
+            raise ValueError("标量与点的数量不一致")
+        
+        scalar_mult = self.scalar_mult
+        return [scalar_mult(k, P) for k, P in zip(scalars, points)]
+    
     def point_power(self, point: Optional[Tuple[int, int]], exponent: int) -> Optional[Tuple[int, int]]:
         """
         椭圆曲线点的幂运算：计算 point^exponent
@@ -182,10 +488,31 @@ class EllipticCurveGroup:
         Returns:
             随机私钥，范围在 [1, n-1]
         """
-        while True:
-            private_key = secure_random_int(256)
-            if 1 <= private_key < self.n:
-                return private_key
+        # 单次均匀采样，无需循环拒绝
+        return secrets.randbelow(self.n - 1) + 1
+    
+    def generate_private_key_batch(self, count: int) -> List[int]:
+        """
+        批量生成椭圆曲线私钥
+        
+        一次读取 32*count 字节随机数再切分，避免逐个读取系统随机源；
+        超出 [1, n-1] 的值被拒绝并补充生成，保证分布与单个生成一致
+        
+        Args:
+            count: 私钥数量
+            
+        Returns:
+            随机私钥列表，每个范围在 [1, n-1]
+        """
+        keys = []
+        while len(keys) < count:
+            needed = count - len(keys)
+            raw = secure_random(32 * needed)
+            for i in range(0, len(raw), 32):
+                key = int.from_bytes(raw[i:i + 32], 'big')
+                if 1 <= key < self.n:
+                    keys.append(key)
+        return keys
     
     def generate_public_key(self, private_key: int) -> Tuple[int, int]:
         """
@@ -197,13 +524,13 @@ class EllipticCurveGroup:
         Returns:
             公钥点 = private_key * G
         """
-        return self.scalar_mult(private_key, self.G)
+        return self.scalar_mult_base(private_key)
     
     def mod_inverse(self, a: int, m: int) -> int:
         """
         计算模逆：找到 x 使得 ax ≡ 1 (mod m)
         
-        使用扩展欧几里得算法
+        使用扩展欧几里得算法（内置pow实现）
         
         Args:
             a: 输入数
@@ -212,28 +539,52 @@ class EllipticCurveGroup:
         Returns:
             a在模m下的逆元
         """
-        if a < 0:
-            a = (a % m + m) % m
+        # pow(a, -1, m)在C层完成扩展欧几里得运算，替代递归的Python实现
+        try:
+            return pow(a % m, -1, m)
+        except ValueError:
+            raise ValueError("模逆不存在") from None
+    
+    def point_to_bytes(self, point: Optional[Tuple[int, int]]) -> bytes:
+        """
+        将椭圆曲线点编码为SEC1非压缩格式字节串
+        
+        有限点编码为 0x04 || x || y（65字节），无穷远点编码为单字节 0x00
         
-        # 扩展欧几里得算法
-        def extended_gcd(a, b):
-            if a == 0:
-                return b, 0, 1
-            gcd, x1, y1 = extended_gcd(b % a, a)
-            x = y1 - (b // a) * x1
-            y = x1
-            return gcd, x, y
+        Args:
+            point: 椭圆曲线点
+            
+        Returns:
+            点的字节表示
+        """
+        if point is None:
+            return b'\x00'
+        return point_to_bytes(point)
+    
+    def point_from_bytes(self, data: bytes) -> Optional[Tuple[int, int]]:
+        """
+        从SEC1非压缩格式字节串恢复椭圆曲线点（point_to_bytes的逆运算）
         
-        gcd, x, _ = extended_gcd(a, m)
-        if gcd != 1:
-            raise ValueError("模逆不存在")
+        Args:
+            data: 点的字节表示
+            
+        Returns:
+            椭圆曲线点
+        """
+        if data == b'\x00':
+            return None
         
-        return (x % m + m) % m
+        point = bytes_to_point(data)
+        if not self.is_on_curve(point):
+            raise ValueError("点不在曲线上")
+        return point
     
     def point_to_string(self, point: Optional[Tuple[int, int]]) -> str:
         """
         将椭圆曲线点转换为字符串表示
         
+        仅用于调试输出；序列化请使用二进制的point_to_bytes
+        
         Args:
             point: 椭圆曲线点
             
@@ -8,11 +8,36 @@ Paillier同态加密实现
 - 批量加密优化
 """
 
+import functools
+import multiprocessing
 import random
 import secrets
-from typing import Tuple, List
+from typing import Tuple, List, Union
 from .crypto_utils import secure_random_int
 
+try:
+    import gmpy2
+    _powmod = gmpy2.powmod
+except ImportError:  # gmpy2为可选依赖，缺失时使用内置pow
+    gmpy2 = None
+    _powmod = pow
+
+try:  # 可选的Cython编译扩展（python setup.py build_ext --inplace）
+    from ._fast import sum_ct as _sum_ct
+except ImportError:
+    _sum_ct = None
+
+
+def _encrypt_chunk(args) -> List[int]:
+    """
+    在工作进程中加密一块连续的明文
+
+    模块级函数，便于进程池序列化；只传递公钥，私钥不会进入工作进程，
+    每个工作进程内部仍走串行批量加密路径（含 r^n 摊销）
+    """
+    public_key, plaintexts = args
+    return PaillierEncryption().batch_encrypt(plaintexts, public_key)
+
 
 class PaillierEncryption:
     """
@@ -25,6 +50,11 @@ class PaillierEncryption:
     密钥大小：1024位（安全级别对应256位椭圆曲线）
     """
     
+    # 短指数随机化时随机指数的位长度
+    SHORT_EXPONENT_BITS = 256
+    # 不含h_n的公钥预计算的 r^n 数量
+    RN_POOL_SIZE = 8
+    
     def __init__(self, key_size: int = 1024):
         """
         初始化Paillier加密系统
@@ -35,6 +65,9 @@ class PaillierEncryption:
         self.key_size = key_size
         self.public_key = None
         self.private_key = None
+        # 不含h_n的公钥所用的 r^n 预计算池：n -> [r_i^n mod n²]，首次使用时生成
+        self._rn_pool = {}
+        self._rn_pool_index = 0
     
     def generate_keypair(self) -> Tuple[dict, dict]:
         """
@@ -67,18 +100,35 @@ class PaillierEncryption:
         l_result = (g_lambda - 1) // n
         mu = self._mod_inverse(l_result, n)
         
+        # 短指数随机化参数：随机 h ∈ Z_n*，预计算 h^n mod n²
+        h_n = pow(self._sample_r(n), n, n_squared)
+        
         # 构造密钥
         public_key = {
             'n': n,
             'g': g,
-            'n_squared': n_squared
+            'n_squared': n_squared,
+            'h_n': h_n
         }
         
+        # CRT解密参数：分别在模p²、q²下解密，指数与模数长度减半
+        p_squared = p * p
+        q_squared = q * q
+        h_p = self._mod_inverse((pow(g, p - 1, p_squared) - 1) // p, p)
+        h_q = self._mod_inverse((pow(g, q - 1, q_squared) - 1) // q, q)
+        
         private_key = {
             'lambda': lambda_n,
             'mu': mu,
             'n': n,
-            'n_squared': n_squared
+            'n_squared': n_squared,
+            'p': p,
+            'q': q,
+            'p_squared': p_squared,
+            'q_squared': q_squared,
+            'h_p': h_p,
+            'h_q': h_q,
+            'q_inv': self._mod_inverse(q, p),
         }
         
         self.public_key = public_key
@@ -111,14 +161,8 @@ class PaillierEncryption:
         if plaintext < 0 or plaintext >= n:
             plaintext = plaintext % n
         
-        # 生成随机数 r，满足 gcd(r, n) = 1
-        while True:
-            r = secure_random_int(self.key_size)
-            if r < n and self._gcd(r, n) == 1:
-                break
-        
         # 计算密文：c = g^m * r^n mod n²
-        ciphertext = (pow(g, plaintext, n_squared) * pow(r, n, n_squared)) % n_squared
+        ciphertext = (self._g_power(g, plaintext, n, n_squared) * self._random_rn(public_key)) % n_squared
         
         return ciphertext
     
@@ -139,13 +183,16 @@ class PaillierEncryption:
         if private_key is None:
             raise ValueError("需要提供私钥")
         
+        if 'p' in private_key:
+            return self._decrypt_crt(ciphertext, private_key)
+        
         lambda_n = private_key['lambda']
         mu = private_key['mu']
         n = private_key['n']
         n_squared = private_key['n_squared']
         
         # 计算 c^λ mod n²
-        c_lambda = pow(ciphertext, lambda_n, n_squared)
+        c_lambda = _powmod(ciphertext, lambda_n, n_squared)
         
         # 计算 L(c^λ mod n²)
         l_result = (c_lambda - 1) // n
@@ -153,7 +200,30 @@ class PaillierEncryption:
         # 计算明文：m = L(c^λ mod n²) * μ mod n
         plaintext = (l_result * mu) % n
         
-        return plaintext
+        return int(plaintext)
+    
+    def _decrypt_crt(self, ciphertext: int, private_key: dict) -> int:
+        """
+        基于中国剩余定理的解密
+        
+        m_p = L_p(c^(p-1) mod p²) * h_p mod p，m_q同理，再用CRT合并为模n的明文；
+        两次模幂的指数和模数都只有原来的一半
+        
+        Args:
+            ciphertext: 要解密的密文
+            private_key: 包含p、q及CRT参数的私钥
+            
+        Returns:
+            明文
+        """
+        p = private_key['p']
+        q = private_key['q']
+        
+        m_p = (_powmod(ciphertext, p - 1, private_key['p_squared']) - 1) // p * private_key['h_p'] % p
+        m_q = (_powmod(ciphertext, q - 1, private_key['q_squared']) - 1) // q * private_key['h_q'] % q
+        
+        # CRT合并：m = m_q + q * ((m_p - m_q) * q⁻¹ mod p)
+        return int(m_q + q * ((m_p - m_q) * private_key['q_inv'] % p))
     
     def add_ciphertexts(self, c1: int, c2: int, public_key: dict = None) -> int:
         """
@@ -214,38 +284,88 @@ class PaillierEncryption:
         if public_key is None:
             raise ValueError("需要提供公钥")
         
-        n = public_key['n']
         n_squared = public_key['n_squared']
         
-        # 生成新的随机数
-        while True:
-            r = secure_random_int(self.key_size)
-            if r < n and self._gcd(r, n) == 1:
-                break
-        
-        # 计算重随机化密文：c' = c * r^n mod n²
-        refreshed = (ciphertext * pow(r, n, n_squared)) % n_squared
+        # 计算重随机化密文：c' = c * r^n mod n²（只需 r^n 这一次模幂，不涉及g^m）
+        refreshed = (ciphertext * self._random_rn(public_key)) % n_squared
         return refreshed
     
-    def batch_encrypt(self, plaintexts: List[int], public_key: dict = None) -> List[int]:
+    def batch_encrypt(self, plaintexts: List[int], public_key: dict = None,
+                      workers: int = 1) -> List[int]:
         """
         批量加密
         
         Args:
             plaintexts: 明文列表
             public_key: 公钥
+            workers: 进程数；大于1时将明文按连续块分给进程池并行加密
             
         Returns:
             密文列表
         """
-        return [self.encrypt(pt, public_key) for pt in plaintexts]
+        if public_key is None:
+            public_key = self.public_key
+        
+        if public_key is None:
+            raise ValueError("需要提供公钥")
+        
+        if workers > 1 and len(plaintexts) > 1:
+            # 按连续块分给进程池，每块在工作进程中批量加密，结果保持输入顺序
+            chunk_size = -(-len(plaintexts) // workers)
+            chunks = [(public_key, plaintexts[i:i + chunk_size])
+                      for i in range(0, len(plaintexts), chunk_size)]
+            with multiprocessing.Pool(processes=workers) as pool:
+                results = pool.map(_encrypt_chunk, chunks)
+            return [ciphertext for chunk in results for ciphertext in chunk]
+        
+        # 公钥字段只取一次，模幂在安装了gmpy2时使用GMP实现
+        n = public_key['n']
+        g = public_key['g']
+        n_squared = public_key['n_squared']
+        
+        ciphertexts = []
+        for plaintext in plaintexts:
+            if plaintext < 0 or plaintext >= n:
+                plaintext = plaintext % n
+            g_m = self._g_power(g, plaintext, n, n_squared)
+            ciphertexts.append(int(g_m * self._random_rn(public_key) % n_squared))
+        return ciphertexts
+    
+    def sum_and_refresh(self, ciphertexts: List[int], public_key: dict = None) -> int:
+        """
+        计算多个密文的同态和并重随机化（单次遍历）
+        
+        以新随机数的 r^n（即E(0)）作为累乘初值，一次遍历同时完成求和与
+        重随机化；空列表时结果即为E(0)，无需额外的加密运算
+        
+        Args:
+            ciphertexts: 密文列表
+            public_key: 公钥
+            
+        Returns:
+            所有密文对应明文之和的重随机化密文
+        """
+        if public_key is None:
+            public_key = self.public_key
+        
+        if public_key is None:
+            raise ValueError("需要提供公钥")
+        
+        n_squared = public_key['n_squared']
+        
+        result = self._random_rn(public_key)
+        for ciphertext in ciphertexts:
+            result = (result * ciphertext) % n_squared
+        
+        return result
     
-    def sum_ciphertexts(self, ciphertexts: List[int], public_key: dict = None) -> int:
+    def sum_ciphertexts(self, ciphertexts: Union[List[int], bytes],
+                        public_key: dict = None) -> int:
         """
         计算多个密文的同态和
         
         Args:
-            ciphertexts: 密文列表
+            ciphertexts: 密文列表，或ciphertexts_to_bytes产生的定长字节串
             public_key: 公钥
             
         Returns:
@@ -254,11 +374,131 @@ class PaillierEncryption:
         if not ciphertexts:
             return self.encrypt(0, public_key)
         
-        result = ciphertexts[0]
-        for i in range(1, len(ciphertexts)):
-            result = self.add_ciphertexts(result, ciphertexts[i], public_key)
+        if public_key is None:
+            public_key = self.public_key
         
-        return result
+        if public_key is None:
+            raise ValueError("需要提供公钥")
+        
+        if isinstance(ciphertexts, (bytes, bytearray)):
+            ciphertexts = self.bytes_to_ciphertexts(ciphertexts, public_key)
+        
+        n_squared = public_key['n_squared']
+        if _sum_ct is not None:
+            return _sum_ct(list(ciphertexts), n_squared)
+        return functools.reduce(lambda acc, c: acc * c % n_squared, ciphertexts)
+    
+    def ciphertexts_to_bytes(self, ciphertexts: List[int], public_key: dict = None) -> bytes:
+        """
+        将密文列表编码为连续的定长字节串
+        
+        每个密文按n²的字节长度以大端序编码后依次拼接，便于网络传输，
+        也比逐个保存的整数对象更紧凑
+        
+        Args:
+            ciphertexts: 密文列表
+            public_key: 公钥
+            
+        Returns:
+            所有密文依次拼接的字节表示
+        """
+        width = self._ciphertext_width(public_key)
+        return b''.join([int(c).to_bytes(width, 'big') for c in ciphertexts])
+    
+    def bytes_to_ciphertexts(self, data: bytes, public_key: dict = None) -> List[int]:
+        """
+        将定长字节串解码为密文列表（ciphertexts_to_bytes的逆运算）
+        
+        Args:
+            data: 若干定长密文依次拼接的字节串
+            public_key: 公钥
+            
+        Returns:
+            密文列表
+        """
+        width = self._ciphertext_width(public_key)
+        if len(data) % width != 0:
+            raise ValueError("无效的密文字节长度")
+        from_bytes = int.from_bytes
+        return [from_bytes(data[i:i + width], 'big') for i in range(0, len(data), width)]
+    
+    def _ciphertext_width(self, public_key: dict = None) -> int:
+        """返回公钥对应的单个密文字节长度（n²的字节长度）"""
+        if public_key is None:
+            public_key = self.public_key
+        
+        if public_key is None:
+            raise ValueError("需要提供公钥")
+        
+        return (int(public_key['n_squared']).bit_length() + 7) // 8
+    
+    def _g_power(self, g: int, plaintext: int, n: int, n_squared: int) -> int:
+        """
+        计算 g^m mod n²
+        
+        g = n + 1 时由二项式定理 (1 + n)^m ≡ 1 + m·n (mod n²)，
+        一次乘法即可代替模幂；其他g仍使用模幂
+        
+        Args:
+            g: 公钥生成元
+            plaintext: 明文m
+            n: 公钥模数
+            n_squared: n²
+            
+        Returns:
+            g^m mod n²
+        """
+        if g == n + 1:
+            return (1 + plaintext * n) % n_squared
+        return _powmod(g, plaintext, n_squared)
+    
+    def _random_rn(self, public_key: dict) -> int:
+        """
+        生成加密/重随机化所需的随机因子 r^n mod n²
+        
+        公钥含预计算的 h_n = h^n mod n² 时采用短指数方式：取SHORT_EXPONENT_BITS位
+        随机数x，r^n = (h^x)^n = h_n^x mod n²，模幂指数从约2048位降到256位。
+        该方式的安全性依赖短指数离散对数假设。
+        
+        不含h_n的公钥（如外部生成的公钥）首次使用时预计算RN_POOL_SIZE个 r_i^n，
+        之后每次循环取池中一个元素，乘以下一个元素的短指数幂：
+        r_i^n * (r_j^n)^x = (r_i * r_j^x)^n，整个会话只需RN_POOL_SIZE次完整模幂
+        
+        Args:
+            public_key: 公钥
+            
+        Returns:
+            随机因子 r^n mod n²
+        """
+        n_squared = public_key['n_squared']
+        x = secure_random_int(self.SHORT_EXPONENT_BITS)
+        h_n = public_key.get('h_n')
+        if h_n is not None:
+            return int(_powmod(h_n, x, n_squared))
+        
+        n = public_key['n']
+        pool = self._rn_pool.get(n)
+        if pool is None:
+            pool = [int(_powmod(self._sample_r(n), n, n_squared)) for _ in range(self.RN_POOL_SIZE)]
+            self._rn_pool[n] = pool
+        
+        i = self._rn_pool_index = (self._rn_pool_index + 1) % len(pool)
+        return int(pool[i] * _powmod(pool[(i + 1) % len(pool)], x, n_squared) % n_squared)
+    
+    def _sample_r(self, n: int) -> int:
+        """
+        生成加密随机数 r ∈ Z_n*，满足 gcd(r, n) = 1
+        
+        Args:
+            n: 公钥模数
+            
+        Returns:
+            随机数r
+        """
+        while True:
+            r = secrets.randbelow(n - 1) + 1
+            if self._gcd(r, n) == 1:
+                return r
     
     def _generate_prime(self, bit_length: int) -> int:
         """
@@ -278,12 +518,19 @@ class PaillierEncryption:
             candidate |= (1 << (bit_length - 1))  # 设置最高位
             candidate |= 1  # 设置最低位（确保奇数）
             
+            if gmpy2 is not None:
+                # 从随机起点取下一个素数，由GMP完成筛选与素性测试
+                prime = int(gmpy2.next_prime(candidate))
+                if prime.bit_length() == bit_length:
+                    return prime
+                continue
+            
             if self._is_prime(candidate):
                 return candidate
     
     def _is_prime(self, n: int, k: int = 20) -> bool:
         """
-        Miller-Rabin素性测试
+        Miller-Rabin素性测试（安装了gmpy2时使用GMP实现）
         
         Args:
             n: 待测试数
@@ -292,6 +539,9 @@ class PaillierEncryption:
         Returns:
             True如果n可能是素数，False如果n是合数
         """
+        if gmpy2 is not None:
+            return gmpy2.is_prime(n, k)
+        
         if n < 2:
             return False
         if n == 2 or n == 3:
@@ -360,15 +610,8 @@ class PaillierEncryption:
         Returns:
             a在模m下的逆元
         """
-        def extended_gcd(a, b):
-            if a == 0:
-                return b, 0, 1
-            gcd, x1, y1 = extended_gcd(b % a, a)
-            x = y1 - (b // a) * x1
-            y = x1
-            return gcd, x, y
-        
-        gcd, x, _ = extended_gcd(a % m, m)
-        if gcd != 1:
-            raise ValueError("模逆不存在")
-        return (x % m + m) % m
+        # pow(a, -1, m)在C层迭代完成扩展欧几里得运算，避免深度递归
+        try:
+            return pow(a % m, -1, m)
+        except ValueError:
+            raise ValueError("模逆不存在") from None
@@ -4,10 +4,55 @@ Google Password Checkup协议的专门实现
 基于论文 https://eprint.iacr.org/2019/723.pdf Section 3.1 Figure 2
 """
 
+import functools
 import hashlib
+import math
 import os
-import random
-from typing import List, Tuple, Set
+import secrets
+from typing import List, Optional, Tuple, Set, Union
+
+import numpy as np
+
+try:
+    from .differential_privacy import DifferentialPrivacy
+except ImportError:  # 作为脚本直接运行时
+    from differential_privacy import DifferentialPrivacy
+
+# 哈希值与掩码的字节长度（SHA-256）
+HASH_SIZE = 32
+# 成员检查所用的哈希前缀长度：取前8字节作为uint64键，
+# 任意两个不同密码碰撞的概率约为2^-64，远低于实际数据库规模下的需求
+KEY_SIZE = 8
+
+
+def _as_hash_array(rows: Union[np.ndarray, List[bytes]]) -> np.ndarray:
+    """将32字节串列表转换为形状为 (N, 32) 的uint8数组；数组原样返回"""
+    if isinstance(rows, np.ndarray):
+        return rows
+    return np.frombuffer(b''.join(rows), dtype=np.uint8).reshape(-1, HASH_SIZE)
+
+
+def _hash_keys(hashes: np.ndarray) -> List[int]:
+    """取每个哈希的前KEY_SIZE字节，按大端序转换为整数键"""
+    prefixes = np.ascontiguousarray(hashes[:, :KEY_SIZE])
+    return prefixes.view('>u8').ravel().tolist()
+
+
+def _flip_with_probability(results: np.ndarray, noise_prob: float) -> np.ndarray:
+    """一次生成全部伯努利翻转位，按位异或翻转结果"""
+    flips = DifferentialPrivacy._uniform(results.size) < noise_prob
+    return results ^ flips
+
+
+def _flip_half_packed(results: np.ndarray) -> np.ndarray:
+    """
+    以1/2概率翻转每条结果（ε=0）
+    
+    每个随机比特即一次翻转：将结果打包为位图后与随机字节整体异或，每字节处理8条结果
+    """
+    packed = np.packbits(results)
+    packed ^= np.frombuffer(secrets.token_bytes(packed.size), dtype=np.uint8)
+    return np.unpackbits(packed, count=results.size).astype(bool)
 
 class PasswordCheckupProtocol:
     """
@@ -15,116 +60,164 @@ class PasswordCheckupProtocol:
     实现论文Section 3.1中描述的PSI协议
     """
     
-    def __init__(self):
+    def __init__(self, cache_hashes: bool = False):
+        """
+        Args:
+            cache_hashes: 是否缓存密码哈希（演示/测试中重复哈希同一批密码时使用）；
+                缓存会在内存中保留明文密码，隐私敏感场景应保持关闭
+        """
         self.security_parameter = 256
         self.hash_function = hashlib.sha256
+        self._hash_cache = functools.lru_cache(maxsize=None)(self._raw_hash) if cache_hashes else None
+    
+    def _raw_hash(self, password: str) -> bytes:
+        """计算单个密码的SHA-256哈希（不经缓存）"""
+        return self.hash_function(password.encode()).digest()
+    
+    def clear_hash_cache(self):
+        """清空密码哈希缓存，释放其中保留的明文密码"""
+        if self._hash_cache is not None:
+            self._hash_cache.cache_clear()
         
     def hash_password(self, password: str) -> bytes:
         """对密码进行哈希"""
-        return self.hash_function(password.encode()).digest()
+        if self._hash_cache is not None:
+            return self._hash_cache(password)
+        return self._raw_hash(password)
     
-    def client_phase1(self, user_passwords: List[str]) -> Tuple[List[bytes], List[bytes]]:
+    def hash_passwords(self, passwords) -> List[bytes]:
+        """
+        批量对密码进行哈希
+        
+        哈希函数与编码方法只查找一次，每个密码只需一次C层的SHA-256调用
+        （hashlib基于OpenSSL，支持时自动使用SHA扩展指令）
+        """
+        if self._hash_cache is not None:
+            return list(map(self._hash_cache, passwords))
+        hash_function = self.hash_function
+        return [hash_function(pwd.encode()).digest() for pwd in passwords]
+    
+    def client_phase1(self, user_passwords: List[str]) -> Tuple[np.ndarray, np.ndarray]:
         """
         客户端第一阶段：准备用户密码
+        
+        哈希值与掩码均为形状 (N, 32) 的uint8数组，每行对应一个密码
         """
         print("📱 客户端第一阶段：密码哈希化")
         
         # 对用户密码进行哈希
-        hashed_passwords = []
-        for pwd in user_passwords:
-            hash_val = self.hash_password(pwd)
-            hashed_passwords.append(hash_val)
-        
-        # 生成随机掩码
-        masks = []
-        for _ in range(len(user_passwords)):
-            mask = os.urandom(32)
-            masks.append(mask)
-        
-        # 应用掩码
-        masked_hashes = []
-        for i, hash_val in enumerate(hashed_passwords):
-            masked = bytes(a ^ b for a, b in zip(hash_val, masks[i]))
-            masked_hashes.append(masked)
+        hashed_passwords = _as_hash_array(self.hash_passwords(user_passwords))
+        
+        # 一次生成全部随机掩码
+        count = len(hashed_passwords)
+        masks = np.frombuffer(os.urandom(HASH_SIZE * count), dtype=np.uint8).reshape(count, HASH_SIZE)
+        
+        # 应用掩码：整体按位异或
+        masked_hashes = np.bitwise_xor(hashed_passwords, masks)
         
         return masked_hashes, masks
     
-    def server_phase1(self, breach_database: Set[str]) -> List[bytes]:
+    def server_phase1(self, breach_database: Set[str]) -> np.ndarray:
         """
         服务器第一阶段：准备泄露数据库
+        
+        返回形状为 (N, 32) 的uint8数组，每行对应一个泄露密码的哈希
         """
         print("🖥️  服务器第一阶段：数据库哈希化")
         
-        hashed_breached = []
-        for pwd in breach_database:
-            hash_val = self.hash_password(pwd)
-            hashed_breached.append(hash_val)
-        
-        return hashed_breached
+        return _as_hash_array(self.hash_passwords(breach_database))
     
-    def psi_intersection(self, client_masked: List[bytes], 
-                        server_hashed: List[bytes], 
-                        client_masks: List[bytes]) -> List[bool]:
+    def psi_intersection(self, client_hashes: Union[np.ndarray, List[bytes]], 
+                        server_hashed: Union[np.ndarray, List[bytes]], 
+                        client_masks: Union[np.ndarray, List[bytes], None] = None) -> List[bool]:
         """
         私有集合交集计算
+        
+        client_masks为None时client_hashes即原始哈希；否则视为掩码后的哈希，先去掩码
         """
         print("🔒 执行私有集合交集计算")
         
         # 简化的PSI实现
-        results = []
+        # 掩码时整体异或恢复原始哈希
+        original_hashes = _as_hash_array(client_hashes)
+        if client_masks is not None:
+            original_hashes = np.bitwise_xor(original_hashes, _as_hash_array(client_masks))
         
-        for i, masked_hash in enumerate(client_masked):
-            # 恢复原始哈希
-            original_hash = bytes(a ^ b for a, b in zip(masked_hash, client_masks[i]))
-            
-            # 检查是否在服务器集合中
-            is_compromised = original_hash in server_hashed
-            results.append(is_compromised)
-        
-        return results
+        # 键为哈希的64位前缀，查找时不必构造和比较32字节串。
+        # 只为客户端的键建集合，服务器的键逐个在其中查找，交集之外的服务器条目
+        # 不进入任何集合；之后逐条检查只需查询规模不超过客户端的交集
+        client_keys = _hash_keys(original_hashes)
+        matched = frozenset(client_keys).intersection(_hash_keys(_as_hash_array(server_hashed)))
+        return [key in matched for key in client_keys]
     
     def differential_privacy_noise(self, results: List[bool], epsilon: float = 1.0) -> List[bool]:
         """
-        添加差分隐私噪声
+        添加差分隐私噪声（随机响应：逐条独立翻转，输出带噪声的结果向量）
         """
         print(f"🎭 添加差分隐私噪声 (ε={epsilon})")
         
-        noisy_results = []
-        for result in results:
-            # Laplace机制简化版本
-            noise_prob = 1 / (1 + math.exp(epsilon))
-            if random.random() < noise_prob:
-                # 翻转结果
-                noisy_results.append(not result)
-            else:
-                noisy_results.append(result)
+        # 翻转概率只计算一次
+        noise_prob = 1.0 / (1.0 + math.exp(epsilon))
         
-        return noisy_results
+        results_arr = np.asarray(results, dtype=bool)
+        if noise_prob == 0.5:
+            return _flip_half_packed(results_arr).tolist()
+        return _flip_with_probability(results_arr, noise_prob).tolist()
+    
+    def release_count(self, results: List[bool], epsilon: float = 1.0) -> int:
+        """
+        以Laplace机制发布泄露密码数量
+        
+        计数的敏感度为1，对总和加一次 Lap(1/ε) 噪声即满足ε-差分隐私，
+        与结果条数无关只需一次随机数采样（由DifferentialPrivacy的CSPRNG采样器生成）
+        """
+        print(f"🎭 Laplace机制发布计数 (ε={epsilon})")
+        
+        noisy_count = DifferentialPrivacy(epsilon).laplace_mechanism(int(sum(results)))
+        return int(math.floor(noisy_count))
     
     def run_protocol(self, user_passwords: List[str], 
-                    breach_database: Set[str]) -> Tuple[List[bool], int]:
+                    breach_database: Set[str],
+                    per_record_noise: bool = False,
+                    mask: bool = False,
+                    epsilon: float = 1.0) -> Tuple[Optional[List[bool]], int]:
         """
         运行完整的Password Checkup协议
+        
+        默认只以Laplace机制发布泄露数量，不返回逐条结果（第一项为None）；
+        per_record_noise为True时改用随机响应，返回带噪声的结果向量及其计数。
+        两种方式都不会返回未加噪的逐条交集结果。
+        本地模拟中服务器不接触掩码后的哈希，掩码/去掩码往返默认跳过；
+        mask为True时保留该步骤以完整演示协议流程
+        
+        Returns:
+            (带噪声的逐条结果或None, 带噪声的泄露数量)
         """
         print("🚀 启动Google Password Checkup协议")
         print("=" * 50)
         
         # 客户端准备
-        client_masked, client_masks = self.client_phase1(user_passwords)
+        if mask:
+            client_hashes, client_masks = self.client_phase1(user_passwords)
+        else:
+            print("📱 客户端第一阶段：密码哈希化")
+            client_hashes, client_masks = self.hash_passwords(user_passwords), None
         
         # 服务器准备
         server_hashed = self.server_phase1(breach_database)
         
         # PSI计算
         intersection_results = self.psi_intersection(
-            client_masked, server_hashed, client_masks
+            client_hashes, server_hashed, client_masks
         )
         
         # 差分隐私
-        private_results = self.differential_privacy_noise(intersection_results)
-        
-        # 统计泄露密码数量
-        compromised_count = sum(private_results)
+        if per_record_noise:
+            private_results = self.differential_privacy_noise(intersection_results, epsilon)
+            compromised_count = sum(private_results)
+        else:
+            private_results = None
+            compromised_count = self.release_count(intersection_results, epsilon)
         
         print("✅ 协议执行完成")
         return private_results, compromised_count
@@ -174,6 +267,5 @@ def demo_password_checkup():
     return True
 
 if __name__ == "__main__":
-    import math
     success = demo_password_checkup()
     exit(0 if success else 1)
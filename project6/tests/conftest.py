@@ -0,0 +1,52 @@
+"""
+pytest公共配置
+
+- 将项目根目录加入sys.path，并把src包中的模块以测试使用的扁平名称注册，
+  各测试文件无需再自行修改sys.path
+- 会话级的Paillier密钥对：首次生成后序列化到tests/fixtures/，
+  之后的测试会话直接加载，避免重复生成密钥
+"""
+
+import importlib
+import os
+import pickle
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(TESTS_DIR)
+KEYPAIR_PATH = os.path.join(TESTS_DIR, "fixtures", "paillier_keypair.pkl")
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# src内部使用相对导入，测试以扁平名称导入时需指向同一包内的模块
+for _name in ("crypto_utils", "elliptic_curve", "paillier_encryption", "ddh_psi",
+              "differential_privacy", "password_checkup"):
+    sys.modules.setdefault(_name, importlib.import_module("src." + _name))
+
+from paillier_encryption import PaillierEncryption  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def paillier_keypair():
+    """加载或生成（并持久化）测试共用的Paillier密钥对"""
+    if os.path.exists(KEYPAIR_PATH):
+        with open(KEYPAIR_PATH, "rb") as f:
+            return pickle.load(f)
+
+    keypair = PaillierEncryption().generate_keypair()
+    os.makedirs(os.path.dirname(KEYPAIR_PATH), exist_ok=True)
+    with open(KEYPAIR_PATH, "wb") as f:
+        pickle.dump(keypair, f)
+    return keypair
+
+
+@pytest.fixture(scope="class")
+def shared_paillier(request, paillier_keypair):
+    """为测试类提供使用会话密钥对的Paillier实例（cls.paillier）"""
+    paillier = PaillierEncryption()
+    paillier.public_key, paillier.private_key = paillier_keypair
+    request.cls.paillier = paillier
+    return paillier
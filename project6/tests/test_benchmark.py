@@ -0,0 +1,26 @@
+"""
+性能基准测试脚本的冒烟测试
+
+验证扩展性测试的串行与进程池路径均可执行并返回正确的交集
+"""
+
+import unittest
+
+from benchmarks.performance_benchmark import DDHPSIBenchmark, SCALABILITY_DTYPE
+
+
+class TestScalabilityBenchmark(unittest.TestCase):
+    """协议扩展性基准测试"""
+    
+    def test_parallel_and_serial(self):
+        """进程池路径与串行路径均能完成并填充结果"""
+        benchmark = DDHPSIBenchmark()
+        for parallel in (True, False):
+            results = benchmark.benchmark_protocol_scalability([4], parallel=parallel)
+            self.assertEqual(results.dtype, SCALABILITY_DTYPE)
+            self.assertEqual(results['size'].tolist(), [4])
+            self.assertGreater(results['average_time_ms'][0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
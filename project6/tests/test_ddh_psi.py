@@ -5,18 +5,43 @@ DDH-PSI协议正确性和安全性测试
 """
 
 import unittest
-import sys
 import os
+import tempfile
 
-# 添加src目录到路径
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import numpy as np
+import pytest
 
 from ddh_psi import DDHPSIProtocol, DDHPSIParty1, DDHPSIParty2
+from elliptic_curve import EllipticCurveGroup
+from paillier_encryption import PaillierEncryption
+from crypto_utils import HashToCurveCache, hash_to_curve, hash_to_curve_batch
 
 
+@pytest.mark.usefixtures("shared_paillier")
 class TestDDHPSIProtocol(unittest.TestCase):
     """DDH-PSI协议功能测试"""
     
+    paillier = None
+    
+    @classmethod
+    def setUpClass(cls):
+        """只生成一次椭圆曲线群，供各测试复用"""
+        cls.ec_group = EllipticCurveGroup()
+    
+    def setUp(self):
+        """清空哈希到曲线的缓存，避免测试之间相互影响"""
+        hash_to_curve.cache_clear()
+        # 在pytest下由会话级夹具提供Paillier密钥对；直接用unittest运行时只生成一次
+        if self.paillier is None:
+            type(self).paillier = PaillierEncryption()
+            self.paillier.generate_keypair()
+    
+    def _run_protocol(self, party1_data, party2_data, **kwargs):
+        """使用共享的群与密钥对执行协议（协议私钥每次运行仍重新生成）"""
+        return DDHPSIProtocol.run_protocol(party1_data, party2_data,
+                                           ec_group=self.ec_group, paillier=self.paillier,
+                                           **kwargs)
+    
     def test_basic_intersection(self):
         """测试基本交集计算"""
         # 准备测试数据
@@ -24,7 +49,7 @@ class TestDDHPSIProtocol(unittest.TestCase):
         party2_data = [("user1", 100), ("user3", 200), ("user5", 150)]
         
         # 执行协议
-        protocol_size, protocol_sum = DDHPSIProtocol.run_protocol(party1_data, party2_data)
+        protocol_size, protocol_sum = self._run_protocol(party1_data, party2_data)
         
         # 验证结果
         expected_size, expected_sum = DDHPSIProtocol.validate_intersection(party1_data, party2_data)
@@ -37,7 +62,7 @@ class TestDDHPSIProtocol(unittest.TestCase):
         party1_data = ["user1", "user2"]
         party2_data = [("user3", 100), ("user4", 200)]
         
-        protocol_size, protocol_sum = DDHPSIProtocol.run_protocol(party1_data, party2_data)
+        protocol_size, protocol_sum = self._run_protocol(party1_data, party2_data)
         
         self.assertEqual(protocol_size, 0)
         self.assertEqual(protocol_sum, 0)
@@ -47,7 +72,7 @@ class TestDDHPSIProtocol(unittest.TestCase):
         party1_data = ["user1", "user2", "user3"]
         party2_data = [("user1", 100), ("user2", 200), ("user3", 300)]
         
-        protocol_size, protocol_sum = DDHPSIProtocol.run_protocol(party1_data, party2_data)
+        protocol_size, protocol_sum = self._run_protocol(party1_data, party2_data)
         
         self.assertEqual(protocol_size, 3)
         self.assertEqual(protocol_sum, 600)
@@ -57,7 +82,7 @@ class TestDDHPSIProtocol(unittest.TestCase):
         party1_data = ["user1", "user2"]
         party2_data = [("user1", 1000000), ("user2", 2000000)]
         
-        protocol_size, protocol_sum = DDHPSIProtocol.run_protocol(party1_data, party2_data)
+        protocol_size, protocol_sum = self._run_protocol(party1_data, party2_data)
         
         self.assertEqual(protocol_size, 2)
         self.assertEqual(protocol_sum, 3000000)
@@ -67,7 +92,7 @@ class TestDDHPSIProtocol(unittest.TestCase):
         party1_data = ["user1"]
         party2_data = [("user1", 42)]
         
-        protocol_size, protocol_sum = DDHPSIProtocol.run_protocol(party1_data, party2_data)
+        protocol_size, protocol_sum = self._run_protocol(party1_data, party2_data)
         
         self.assertEqual(protocol_size, 1)
         self.assertEqual(protocol_sum, 42)
@@ -78,7 +103,7 @@ class TestDDHPSIProtocol(unittest.TestCase):
         party2_data = [("user1", 100), ("user2", 200)]
         
         # 协议应该正确处理重复项
-        protocol_size, protocol_sum = DDHPSIProtocol.run_protocol(party1_data, party2_data)
+        protocol_size, protocol_sum = self._run_protocol(party1_data, party2_data)
         
         # 验证：重复项应该被去重处理
         unique_party1 = list(set(party1_data))
@@ -92,7 +117,7 @@ class TestDDHPSIProtocol(unittest.TestCase):
         party1_data = ["user1", "user2"]
         party2_data = [("user1", 0), ("user2", 100)]
         
-        protocol_size, protocol_sum = DDHPSIProtocol.run_protocol(party1_data, party2_data)
+        protocol_size, protocol_sum = self._run_protocol(party1_data, party2_data)
         
         self.assertEqual(protocol_size, 2)
         self.assertEqual(protocol_sum, 100)
@@ -102,7 +127,7 @@ class TestDDHPSIProtocol(unittest.TestCase):
         party1_data = ["user1", "user2"]
         party2_data = [("user1", -50), ("user2", 100)]
         
-        protocol_size, protocol_sum = DDHPSIProtocol.run_protocol(party1_data, party2_data)
+        protocol_size, protocol_sum = self._run_protocol(party1_data, party2_data)
         
         self.assertEqual(protocol_size, 2)
         # 注意：由于Paillier加密的模运算特性，负数会被转换
@@ -118,7 +143,7 @@ class TestDDHPSIProtocol(unittest.TestCase):
         # 多次执行协议
         results = []
         for _ in range(3):
-            size, sum_val = DDHPSIProtocol.run_protocol(party1_data, party2_data)
+            size, sum_val = self._run_protocol(party1_data, party2_data)
             results.append((size, sum_val))
         
         # 验证结果一致性
@@ -126,13 +151,105 @@ class TestDDHPSIProtocol(unittest.TestCase):
         for result in results[1:]:
             self.assertEqual(result, first_result)
     
+    def test_shared_keys_across_runs(self):
+        """测试复用预生成的Paillier密钥对执行多次协议"""
+        ec_group = EllipticCurveGroup()
+        paillier = PaillierEncryption()
+        public_key, _ = paillier.generate_keypair()
+        
+        party1_data = ["user1", "user2", "user3"]
+        party2_data = [("user1", 100), ("user3", 300), ("user5", 500)]
+        
+        for _ in range(2):
+            result = DDHPSIProtocol.run_protocol(party1_data, party2_data,
+                                                 ec_group=ec_group, paillier=paillier)
+            self.assertEqual(result, (2, 400))
+        
+        # 密钥对应被沿用而非重新生成
+        self.assertIs(paillier.public_key, public_key)
+    
+    def test_bytes_identifiers(self):
+        """测试字节串标识符与字符串标识符得到相同结果"""
+        party1_data = [b"user1", b"user2", b"user3"]
+        party2_data = [(b"user1", 100), (b"user3", 300), (b"user5", 500)]
+        
+        result = self._run_protocol(party1_data, party2_data)
+        self.assertEqual(result, (2, 400))
+    
+    def test_plain_mode(self):
+        """测试明文模式与完整协议结果一致"""
+        party1_data = ["user1", "user2", "user3", "user4"]
+        party2_data = [("user2", 20), ("user4", 40), ("user6", 60)]
+        
+        plain = self._run_protocol(party1_data, party2_data, mode="plain")
+        self.assertEqual(plain, (2, 60))
+        self.assertEqual(plain, self._run_protocol(party1_data, party2_data))
+        
+        with self.assertRaises(ValueError):
+            self._run_protocol(party1_data, party2_data, mode="unknown")
+    
+    def test_batched_aggregation(self):
+        """测试批量聚合模式与逐条模式结果一致"""
+        party1_data = ["user1", "user2", "user3", "user4"]
+        party2_data = [("user2", 20), ("user4", 40), ("user6", 60)]
+        
+        result = self._run_protocol(party1_data, party2_data, aggregate_mode="batched")
+        self.assertEqual(result, (2, 60))
+        
+        # 无交集时结果为E(0)
+        result = self._run_protocol(["a"], [("b", 5)], aggregate_mode="batched")
+        self.assertEqual(result, (0, 0))
+    
+    def test_integer_identifiers(self):
+        """测试64位整数标识符（含numpy数组）"""
+        party1_data = np.arange(10, dtype=np.uint64)
+        party2_data = [(2, 20), (4, 40), (12, 120)]
+        
+        result = self._run_protocol(party1_data, party2_data)
+        self.assertEqual(result, (2, 60))
+    
+    def test_multiprocess_workers(self):
+        """测试多进程执行协议与单进程结果一致"""
+        party1_data = [f"user{i}" for i in range(12)]
+        party2_data = [(f"user{i}", i) for i in range(6, 18)]
+        expected = DDHPSIProtocol.validate_intersection(party1_data, party2_data)
+        
+        for aggregate_mode in ("per_record", "batched"):
+            result = self._run_protocol(party1_data, party2_data,
+                                        aggregate_mode=aggregate_mode, workers=2)
+            self.assertEqual(result, expected)
+    
+    def test_hash_to_curve_batch(self):
+        """测试批量哈希到曲线（串行与多进程结果一致）"""
+        items = [f"user{i}" for i in range(20)] + [b"user", 7]
+        expected = [hash_to_curve(item) for item in items]
+        
+        self.assertEqual(hash_to_curve_batch(items, workers=1), expected)
+        self.assertEqual(hash_to_curve_batch(items, workers=2), expected)
+    
+    def test_hash_to_curve_disk_cache(self):
+        """测试持久化哈希到曲线缓存"""
+        items = ["user1", b"user2", 3]
+        expected = [hash_to_curve(item) for item in items]
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "h2c")
+            with HashToCurveCache(path) as cache:
+                self.assertEqual(cache.get_batch(items), expected)
+            # 重新打开后从磁盘读取
+            with HashToCurveCache(path) as cache:
+                self.assertEqual(cache.get("user1"), expected[0])
+        
+        with self.assertRaises(RuntimeError):
+            HashToCurveCache(path).get("user1")
+    
     def test_different_data_sizes(self):
         """测试不同大小的数据集"""
         # Party1数据较大
         party1_data = [f"user{i}" for i in range(10)]
         party2_data = [("user2", 100), ("user5", 200), ("user8", 300)]
         
-        protocol_size, protocol_sum = DDHPSIProtocol.run_protocol(party1_data, party2_data)
+        protocol_size, protocol_sum = self._run_protocol(party1_data, party2_data)
         expected_size, expected_sum = DDHPSIProtocol.validate_intersection(party1_data, party2_data)
         
         self.assertEqual(protocol_size, expected_size)
@@ -142,7 +259,7 @@ class TestDDHPSIProtocol(unittest.TestCase):
         party1_data = ["user2", "user5"]
         party2_data = [(f"user{i}", i * 10) for i in range(10)]
         
-        protocol_size, protocol_sum = DDHPSIProtocol.run_protocol(party1_data, party2_data)
+        protocol_size, protocol_sum = self._run_protocol(party1_data, party2_data)
         expected_size, expected_sum = DDHPSIProtocol.validate_intersection(party1_data, party2_data)
         
         self.assertEqual(protocol_size, expected_size)
@@ -217,6 +334,37 @@ class TestProtocolSecurity(unittest.TestCase):
         decrypted1 = party2.paillier.decrypt(ciphertext1, party2.paillier_private_key)
         decrypted2 = party2.paillier.decrypt(refreshed, party2.paillier_private_key)
         self.assertEqual(decrypted1, decrypted2, "重随机化前后明文应相同")
+    
+    def test_crt_decryption(self):
+        """验证CRT解密与标准解密结果一致"""
+        paillier = PaillierEncryption()
+        public_key, private_key = paillier.generate_keypair()
+        standard_key = {k: private_key[k] for k in ('lambda', 'mu', 'n', 'n_squared')}
+        
+        n = public_key['n']
+        for value in [0, 1, 12345, n - 1]:
+            ciphertext = paillier.encrypt(value, public_key)
+            self.assertEqual(paillier.decrypt(ciphertext, private_key), value)
+            self.assertEqual(paillier.decrypt(ciphertext, standard_key), value)
+    
+    def test_ciphertext_bytes_conversion(self):
+        """验证密文的定长字节串编码"""
+        paillier = PaillierEncryption()
+        public_key, private_key = paillier.generate_keypair()
+        
+        values = [0, 7, 35]
+        ciphertexts = paillier.batch_encrypt(values, public_key)
+        data = paillier.ciphertexts_to_bytes(ciphertexts, public_key)
+        width = (public_key['n_squared'].bit_length() + 7) // 8
+        self.assertEqual(len(data), width * len(values))
+        self.assertEqual(paillier.bytes_to_ciphertexts(data, public_key), ciphertexts)
+        
+        # 同态求和可直接接收字节串
+        total = paillier.sum_ciphertexts(data, public_key)
+        self.assertEqual(paillier.decrypt(total, private_key), sum(values))
+        
+        with self.assertRaises(ValueError):
+            paillier.bytes_to_ciphertexts(data[:-1], public_key)
 
 
 if __name__ == '__main__':
@@ -4,13 +4,11 @@
 验证椭圆曲线数学运算的正确性和安全性
 """
 
+import pickle
 import unittest
-import sys
-import os
-
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from elliptic_curve import EllipticCurveGroup
+from crypto_utils import point_to_bytes, points_to_bytes, bytes_to_point, bytes_to_points
 
 
 class TestEllipticCurveGroup(unittest.TestCase):
@@ -101,6 +99,79 @@ class TestEllipticCurveGroup(unittest.TestCase):
         right = self.ec.scalar_mult(a * b, G)
         self.assertEqual(left, right)
     
+    def test_private_key_batch(self):
+        """测试批量私钥生成"""
+        keys = self.ec.generate_private_key_batch(50)
+        self.assertEqual(len(keys), 50)
+        self.assertEqual(len(set(keys)), 50)
+        for key in keys:
+            self.assertTrue(1 <= key < self.ec.n)
+        
+        self.assertEqual(self.ec.generate_private_key_batch(0), [])
+    
+    def test_scalar_mult_base(self):
+        """测试基点预计算表标量乘法与通用算法一致"""
+        G = self.ec.G
+        
+        self.assertIsNone(self.ec.scalar_mult_base(0))
+        self.assertIsNone(self.ec.scalar_mult_base(self.ec.n))
+        self.assertEqual(self.ec.scalar_mult_base(1), G)
+        self.assertEqual(self.ec.scalar_mult_base(2), self.ec.point_double(G))
+        
+        for _ in range(5):
+            k = self.ec.generate_private_key()
+            self.assertEqual(self.ec.scalar_mult_base(k), self.ec.scalar_mult(k, G))
+    
+    def test_openssl_backend(self):
+        """测试OpenSSL后端与纯Python实现结果一致"""
+        if self.ec.backend is None:
+            self.skipTest("cryptography不可用")
+        
+        pure = EllipticCurveGroup(use_openssl=False)
+        self.assertIsNone(pure.backend)
+        
+        G = self.ec.G
+        P = self.ec.point_double(G)
+        n = self.ec.n
+        for k in [1, 2, 3, n - 2, n - 1, self.ec.generate_private_key()]:
+            self.assertEqual(self.ec.scalar_mult(k, P), pure.scalar_mult(k, P))
+            self.assertEqual(self.ec.scalar_mult_base(k), pure.scalar_mult_base(k))
+        self.assertIsNone(self.ec.scalar_mult(n, P))
+    
+    def test_pickle_roundtrip(self):
+        """测试群实例可被pickle（多进程传递），且后端设置保持不变"""
+        for use_openssl in (True, False):
+            ec = EllipticCurveGroup(use_openssl=use_openssl)
+            restored = pickle.loads(pickle.dumps(ec))
+            self.assertEqual(restored.backend is None, ec.backend is None)
+            self.assertEqual(restored.scalar_mult(12345, restored.G), ec.scalar_mult(12345, ec.G))
+    
+    def test_batch_point_power(self):
+        """测试批量幂运算（纯Python实现经batch_affine统一求逆）"""
+        pure = EllipticCurveGroup(use_openssl=False)
+        G = self.ec.G
+        points = [G, self.ec.point_double(G), None, self.ec.scalar_mult(12345, G)]
+        k = self.ec.generate_private_key()
+        
+        expected = [self.ec.point_power(P, k) for P in points]
+        self.assertEqual(self.ec.batch_point_power(points, k), expected)
+        self.assertEqual(pure.batch_point_power(points, k), expected)
+        self.assertEqual(pure.batch_point_power([], k), [])
+    
+    def test_scalar_mult_batch(self):
+        """测试批量标量乘法"""
+        G = self.ec.G
+        scalars = [0, 1, 2, 12345, self.ec.generate_private_key()]
+        points = [G, G, G, self.ec.point_double(G), G]
+        
+        results = self.ec.scalar_mult_batch(scalars, points)
+        expected = [self.ec.scalar_mult(k, P) for k, P in zip(scalars, points)]
+        self.assertEqual(results, expected)
+        
+        # 数量不一致应报错
+        with self.assertRaises(ValueError):
+            self.ec.scalar_mult_batch([1, 2], [G])
+    
     def test_private_key_generation(self):
         """测试私钥生成"""
         # 生成多个私钥
@@ -157,6 +228,49 @@ class TestEllipticCurveGroup(unittest.TestCase):
         recovered_none = self.ec.string_to_point(none_str)
         self.assertIsNone(recovered_none)
     
+    def test_point_bytes_conversion(self):
+        """测试点的字节串编码（单点与批量）"""
+        points = [self.ec.generate_public_key(self.ec.generate_private_key())
+                  for _ in range(5)]
+        
+        # 批量编码与逐点编码一致
+        data = points_to_bytes(points)
+        self.assertEqual(data, b''.join(point_to_bytes(P) for P in points))
+        self.assertEqual(len(data), 65 * len(points))
+        
+        # 往返还原
+        self.assertEqual(bytes_to_points(data), points)
+        self.assertEqual(bytes_to_point(data[:65]), points[0])
+        
+        # 长度或前缀错误时拒绝
+        with self.assertRaises(ValueError):
+            bytes_to_points(data[:-1])
+        with self.assertRaises(ValueError):
+            bytes_to_points(b'\x02' + data[1:])
+        
+        # 超出32字节或为负的坐标被拒绝，而不是被截断
+        for bad in [(5, 2 ** 256 + 7), (2 ** 256, 5), (-1, 5)]:
+            with self.assertRaises(OverflowError):
+                point_to_bytes(bad)
+            with self.assertRaises(OverflowError):
+                points_to_bytes([points[0], bad])
+    
+    def test_group_point_bytes(self):
+        """测试椭圆曲线群的SEC1编码（含无穷远点）"""
+        G = self.ec.G
+        data = self.ec.point_to_bytes(G)
+        self.assertEqual(len(data), 65)
+        self.assertEqual(data, point_to_bytes(G))
+        self.assertEqual(self.ec.point_from_bytes(data), G)
+        
+        self.assertEqual(self.ec.point_to_bytes(None), b'\x00')
+        self.assertIsNone(self.ec.point_from_bytes(b'\x00'))
+        
+        # 不在曲线上的点被拒绝
+        bad = point_to_bytes((G[0], (G[1] + 1) % self.ec.p))
+        with self.assertRaises(ValueError):
+            self.ec.point_from_bytes(bad)
+    
     def test_ddh_assumption_support(self):
         """测试DDH假设相关的运算"""
         # 生成随机指数
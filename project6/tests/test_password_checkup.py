@@ -0,0 +1,130 @@
+"""
+Password Checkup协议与差分隐私机制测试
+
+验证交集计算、掩码开关、噪声机制的统计性质及各优化路径的一致性
+"""
+
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import password_checkup
+from password_checkup import PasswordCheckupProtocol, _flip_half_packed, _flip_with_probability
+from differential_privacy import DifferentialPrivacy
+
+
+class TestPasswordCheckup(unittest.TestCase):
+    """Password Checkup协议测试"""
+    
+    def setUp(self):
+        self.protocol = PasswordCheckupProtocol()
+        self.user_passwords = ["password123", "mypassword", "admin", "letmein", "admin"]
+        self.breach_database = {"password123", "123456", "admin", "letmein", "monkey"}
+        self.expected = [pwd in self.breach_database for pwd in self.user_passwords]
+    
+    def test_psi_intersection(self):
+        """测试交集结果（含重复密码、空集合）"""
+        protocol = self.protocol
+        client = protocol.hash_passwords(self.user_passwords)
+        server = protocol.server_phase1(self.breach_database)
+        self.assertEqual(protocol.psi_intersection(client, server), self.expected)
+        
+        # 掩码后的哈希与掩码一起传入时结果相同
+        masked, masks = protocol.client_phase1(self.user_passwords)
+        self.assertEqual(protocol.psi_intersection(masked, server, masks), self.expected)
+        
+        self.assertEqual(protocol.psi_intersection([], server), [])
+        self.assertEqual(protocol.psi_intersection(client, []), [False] * len(client))
+    
+    def test_mask_flag(self):
+        """测试mask开关不影响交集结果"""
+        # ε足够大时随机响应几乎不翻转，带噪声的结果即交集结果
+        for mask in (True, False):
+            results, count = self.protocol.run_protocol(
+                self.user_passwords, self.breach_database,
+                per_record_noise=True, mask=mask, epsilon=50.0)
+            self.assertEqual(results, self.expected)
+            self.assertEqual(count, sum(self.expected))
+    
+    def test_default_release_hides_records(self):
+        """测试默认只发布加噪计数，不返回逐条结果"""
+        results, count = self.protocol.run_protocol(self.user_passwords, self.breach_database)
+        self.assertIsNone(results)
+        self.assertIsInstance(count, int)
+    
+    def test_hash_cache(self):
+        """测试可选的哈希缓存与不缓存时结果一致"""
+        cached = PasswordCheckupProtocol(cache_hashes=True)
+        expected = self.protocol.hash_passwords(self.user_passwords)
+        for _ in range(2):
+            self.assertEqual(cached.hash_passwords(self.user_passwords), expected)
+        self.assertGreater(cached._hash_cache.cache_info().hits, 0)
+        
+        cached.clear_hash_cache()
+        self.assertEqual(cached._hash_cache.cache_info().currsize, 0)
+    
+    def test_randomized_response_rate(self):
+        """测试逐条随机响应的翻转率接近 1/(1+e^ε)"""
+        epsilon = 1.0
+        count = 20000
+        noisy = self.protocol.differential_privacy_noise([False] * count, epsilon)
+        rate = sum(noisy) / count
+        self.assertAlmostEqual(rate, 1.0 / (1.0 + np.exp(epsilon)), delta=0.02)
+    
+    def test_packed_flip_matches_unpacked(self):
+        """测试ε=0时的位图翻转与逐条翻转在相同随机比特下结果一致"""
+        rng = np.random.default_rng(0)
+        results = rng.random(1003) < 0.5
+        flip_bits = rng.random(results.size) < 0.5
+        
+        # 两条路径使用同一组随机比特：字节流中为1的位，均匀随机数取小于1/2的值
+        token_bytes = lambda n: np.packbits(flip_bits).tobytes()[:n]
+        uniform = lambda size: np.where(flip_bits, 0.25, 0.75)
+        with mock.patch.object(password_checkup.secrets, "token_bytes", token_bytes), \
+                mock.patch.object(DifferentialPrivacy, "_uniform", staticmethod(uniform)):
+            packed = _flip_half_packed(results)
+            unpacked = _flip_with_probability(results, 0.5)
+        
+        np.testing.assert_array_equal(packed, unpacked)
+        np.testing.assert_array_equal(packed, results ^ flip_bits)
+        
+        # 实际的ε=0路径翻转率约为1/2
+        noisy = self.protocol.differential_privacy_noise([True] * 20000, epsilon=0.0)
+        self.assertAlmostEqual(1 - sum(noisy) / 20000, 0.5, delta=0.02)
+
+
+class TestDifferentialPrivacy(unittest.TestCase):
+    """差分隐私采样器测试"""
+    
+    def test_laplace_moments(self):
+        """测试Laplace噪声的均值与方差接近 0 与 2/ε²"""
+        epsilon = 2.0
+        dp = DifferentialPrivacy(epsilon)
+        noise = dp.laplace_mechanism_batch(np.zeros(200000))
+        self.assertAlmostEqual(float(noise.mean()), 0.0, delta=0.01)
+        self.assertAlmostEqual(float(noise.var()), 2.0 / epsilon ** 2, delta=0.02)
+    
+    def test_uniform_range(self):
+        """测试CSPRNG均匀随机数位于开区间(0, 1)"""
+        u = DifferentialPrivacy._uniform(10000)
+        self.assertTrue(np.all((u > 0) & (u < 1)))
+        self.assertIsInstance(DifferentialPrivacy._uniform(), float)
+    
+    def test_randomized_response_rate(self):
+        """测试随机化响应以 e^ε/(e^ε+1) 的概率如实回答"""
+        epsilon = 1.0
+        dp = DifferentialPrivacy(epsilon)
+        truthful = sum(dp.randomized_response(True) for _ in range(20000)) / 20000
+        self.assertAlmostEqual(truthful, np.exp(epsilon) / (np.exp(epsilon) + 1), delta=0.02)
+    
+    def test_release_count(self):
+        """测试计数发布为整数且围绕真实值"""
+        protocol = PasswordCheckupProtocol()
+        releases = [protocol.release_count([True] * 10, epsilon=5.0) for _ in range(200)]
+        self.assertTrue(all(isinstance(r, int) for r in releases))
+        self.assertAlmostEqual(np.mean(releases), 10 - 0.5, delta=0.3)
+
+
+if __name__ == '__main__':
+    unittest.main()